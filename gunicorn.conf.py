@@ -0,0 +1,13 @@
+"""Gunicorn settings for ``web`` in the Procfile (``gunicorn server:app``)."""
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 5000)}"
+# One process, so browser pools, caches and in-flight scrapes are shared by every
+# request thread; scale with threads, not workers.
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", 16))
+# Streamed explores can run for minutes; gthread workers heartbeat from their main thread.
+timeout = int(os.environ.get("WEB_TIMEOUT", 120))
+graceful_timeout = 30
+accesslog = "-"
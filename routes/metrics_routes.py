@@ -0,0 +1,55 @@
+from flask import Blueprint, Response
+
+from utils.browser import BLOCK_STATS
+from utils.cache import COUNTERS as CACHE_COUNTERS, current_cache
+from utils.frontier import current_frontier
+from utils.session_store import current_session_store
+from utils.metrics import REGISTRY, render_metrics, split_stats
+from utils.scheduler import get_scheduler
+
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+def _cache_stats():
+    """split_stats() of the cache, or zeros before anything used it (so a scrape never opens the DB)."""
+    cache = current_cache()
+    if cache is None:
+        return dict.fromkeys(CACHE_COUNTERS, 0), {"size": 0, "hit_rate": 0.0, "disk": False}
+    return split_stats(cache)
+
+
+REGISTRY.counter_callback(
+    "tiktok_cache_events_total", "Metadata cache lookups and writes (see /tiktok/cache).",
+    lambda: _cache_stats()[0], label="event",
+)
+REGISTRY.gauge_callback(
+    "tiktok_cache", "Metadata cache size and hit rate.", lambda: _cache_stats()[1], label="stat"
+)
+REGISTRY.counter_callback(
+    "tiktok_blocked_requests_total", "Requests aborted by the resource-blocking layer, by reason.",
+    lambda: dict(BLOCK_STATS), label="reason",
+)
+REGISTRY.counter_callback(
+    "tiktok_frontier_lookups_total", "Crawl frontier lookups (new/due/skipped) and marks (see /tiktok/frontier).",
+    lambda: split_stats(current_frontier())[0], label="result",
+)
+REGISTRY.gauge_callback(
+    "tiktok_frontier", "Crawl frontier size and refresh window.", lambda: split_stats(current_frontier())[1], label="stat"
+)
+REGISTRY.counter_callback(
+    "tiktok_session_events_total", "Stored browser session rotation (warm/cold checkouts, saves, expiries).",
+    lambda: split_stats(current_session_store())[0], label="event",
+)
+REGISTRY.gauge_callback(
+    "tiktok_sessions", "Live stored browser sessions.", lambda: split_stats(current_session_store())[1], label="stat"
+)
+REGISTRY.gauge_callback(
+    "tiktok_breaker_open", "1 while a host is paused by the verify-page circuit breaker.",
+    lambda: {host: st["state"] == "open" for host, st in get_scheduler().stats().items()}, label="host",
+)
+
+
+@metrics_bp.get("/metrics")
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
@@ -1,11 +1,47 @@
-from flask import Blueprint, jsonify, request
+from typing import Dict, Iterable, Iterator
 
-from scrapers.tiktok_base import collect_explore_items
-from scrapers.tiktok_search import search_videos_by_keywords
+from flask import Blueprint, Response, jsonify, request
+
+from scrapers.tiktok_base import iter_explore_items
+from scrapers.tiktok_record import csv_text, dumps, record_json, to_records
+from scrapers.tiktok_search import iter_search_items, parse_keywords
+from utils.browser import iter_in_browser_thread, run_in_browser_thread
+from utils.cache import get_cache
+from utils.frontier import current_frontier, frontier_enabled, get_frontier
+from utils.metrics import timing_scope
+from utils.workers import default_processes
 
 
 tiktok_bp = Blueprint("tiktok", __name__, url_prefix="/tiktok")
 
+NDJSON_MIMETYPE = "application/x-ndjson"
+CSV_MIMETYPE = "text/csv"
+
+
+def _flag(name: str, default: bool) -> bool:
+    value = request.args.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes")
+
+
+def _ndjson(records: Iterable[Dict[str, object]], breakdown=None) -> Iterator[str]:
+    """Serialize records as newline-delimited JSON; a failure becomes a final error line.
+
+    With ``breakdown`` (from utils.metrics.timing_scope) a final timings line is added.
+    """
+    try:
+        for record in records:
+            yield record_json(record) + "\n"
+    except Exception as e:
+        yield dumps({"error": str(e)}) + "\n"
+    if breakdown is not None:
+        yield dumps({"timings": breakdown.as_dict()}) + "\n"
+
+
+def _json(obj) -> Response:
+    return Response(dumps(obj), mimetype="application/json")
+
 
 @tiktok_bp.get("/explore")
 def explore():
@@ -18,20 +54,86 @@ def explore():
     except ValueError:
         return jsonify({"error": "number must be a positive integer"}), 400
 
+    # concurrency: how many video pages to extract in parallel, default 1 (sequential)
+    concurrency_arg = request.args.get("concurrency", "1").strip()
+    try:
+        concurrency = int(concurrency_arg)
+        if concurrency <= 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "concurrency must be a positive integer"}), 400
+
+    # processes: extract videos in that many worker processes instead of threads, default 0 (off)
+    processes_arg = request.args.get("processes", "0").strip()
     try:
+        processes = int(processes_arg)
+        if processes < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "processes must be a non-negative integer"}), 400
+    # Worker processes each own a browser; never more than the shared pool has (TIKTOK_PROCESSES)
+    processes = min(processes, default_processes())
+
+    options = dict(
+        number=number,
         # Use non-headless to improve anti-bot reliability during scraping
-        items = collect_explore_items(number=number, headless=False)
-        return jsonify(items)
+        headless=False,
+        concurrency=concurrency,
+        processes=processes,
+        # capture=1: build records from the explore feed API responses instead of visiting each video
+        capture=_flag("capture", False),
+        # http=1: try a browserless HTTP fetch per video before navigating a page
+        http_first=_flag("http", False),
+        # cache=0: bypass the metadata cache and re-extract every video
+        use_cache=_flag("cache", True),
+        # only_new=1: skip videos an earlier run already returned, unless their stats are due for a refresh
+        only_new=_flag("only_new", False),
+    )
+
+    # timings=1: include a per-stage timing breakdown ({"items": [...], "timings": {...}},
+    # or a final {"timings": ...} line when streaming)
+    timings = _flag("timings", False)
+
+    # stream=1 (or Accept: application/x-ndjson): one JSON record per line as soon as it is extracted
+    if _flag("stream", False) or request.accept_mimetypes.best == NDJSON_MIMETYPE:
+        with timing_scope() as breakdown:
+            records = iter_in_browser_thread(iter_explore_items, **options)
+        return Response(_ndjson(records, breakdown if timings else None), mimetype=NDJSON_MIMETYPE)
+
+    try:
+        with timing_scope() as breakdown:
+            # Run on a persistent browser thread so its warm browser is reused across requests
+            # Records are compacted to VideoRecord as they arrive (see scrapers.tiktok_record)
+            items = run_in_browser_thread(to_records, iter_explore_items(**options))
+        # format=csv: one row per video with a header line
+        if request.args.get("format") == "csv":
+            return Response(csv_text(items), mimetype=CSV_MIMETYPE)
+        if timings:
+            return _json({"items": [r.to_dict() for r in items], "timings": breakdown.as_dict()})
+        return _json([r.to_dict() for r in items])
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@tiktok_bp.get("/cache")
+def cache_stats():
+    return jsonify(get_cache().stats())
+
+
+@tiktok_bp.get("/frontier")
+def frontier_stats():
+    frontier = get_frontier() if frontier_enabled() else current_frontier()
+    return jsonify(frontier.stats() if frontier is not None else {"enabled": False})
+
+
 @tiktok_bp.get("/search")
 def search():
+    # keywords: one or more, separated by commas (e.g. keywords=cat,dog)
     keywords = request.args.get("keywords", "").strip()
-    if not keywords:
+    if not parse_keywords(keywords):
         return jsonify({"error": "please keywords argument"}), 400
 
+    # number: unique videos per keyword, default 10
     number_arg = request.args.get("number", "10").strip()
     try:
         number = int(number_arg)
@@ -40,13 +142,37 @@ def search():
     except ValueError:
         return jsonify({"error": "number must be a positive integer"}), 400
 
+    # concurrency: how many video pages to extract in parallel, default 2
+    concurrency_arg = request.args.get("concurrency", "2").strip()
+    try:
+        concurrency = int(concurrency_arg)
+        if concurrency <= 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "concurrency must be a positive integer"}), 400
+
+    options = dict(
+        number=number,
+        headless=False,
+        concurrency=concurrency,
+        # capture=0: visit every result instead of trusting the search API responses
+        capture=_flag("capture", True),
+        http_first=_flag("http", False),
+        use_cache=_flag("cache", True),
+    )
+
+    if _flag("stream", False) or request.accept_mimetypes.best == NDJSON_MIMETYPE:
+        records = iter_in_browser_thread(iter_search_items, keywords, **options)
+        return Response(_ndjson(records), mimetype=NDJSON_MIMETYPE)
+
     try:
-        video_links = search_videos_by_keywords(keywords)
-        limited = video_links[:number]
-        return jsonify({
+        videos = run_in_browser_thread(to_records, iter_search_items(keywords, **options))
+        if request.args.get("format") == "csv":
+            return Response(csv_text(videos), mimetype=CSV_MIMETYPE)
+        return _json({
             "keywords": keywords,
-            "count": len(limited),
-            "videos": limited,
+            "count": len(videos),
+            "videos": [r.to_dict() for r in videos],
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,79 +1,83 @@
-from bs4 import BeautifulSoup
-from utils.browser import get_page_content, create_page
-from typing import List, Dict
+from utils.browser import (
+    get_page_content,
+    create_page,
+    imap_in_browser_threads,
+    mark_session_consented,
+    rotate_session,
+    session_consented,
+)
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import json
 import re
 import os
-from playwright.sync_api import Page
+import time
+from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
 
+from utils.cache import STATS_FIELDS, MetadataCache, get_cache
+from utils.http import fetch_html
+from utils.metrics import EXTRACT_TIER, FALLBACKS, TIMEOUTS, VERIFY_PAGES, count, stage
+from utils.scheduler import BreakerOpenError, VerifyPageError, get_scheduler
+from utils.frontier import frontier_enabled, get_frontier
+from utils.workers import imap_sharded
+from utils.readiness import (
+    ReadyResult,
+    wait_for_network_quiet,
+    wait_for_stable_count,
+    wait_until_ready,
+)
 
-def fetch_explore_page_html(url: str = "https://www.tiktok.com/explore?lang=cn") -> str:
-    """打开 TikTok 发现页并返回 HTML（基于 Playwright）。"""
-    return get_page_content(url=url, wait_ms=6000, headless=True)
+from scrapers.tiktok_js import call_page_api
+from scrapers.tiktok_parse import (
+    STATE_TIERS,
+    extract_video_metadata_from_html,
+    is_complete_record,
+    is_verify_html,
+    item_to_record,
+    items_from_feed_payload,
+    explore_url,
+    parse_tiktok_explore,
+    video_id_from_url,
+    video_url,
+)
 
 
-def parse_tiktok_explore(html: str):
-    """Parse explore HTML to extract video links and titles, de-duplicated."""
-    soup = BeautifulSoup(html, "lxml")
-    result = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        if "/video/" in href:
-            title_tag = (
-                a.find("div", attrs={"data-e2e": "video-title"})
-                or a.find("strong")
-                or a.find("span")
-            )
-            title = title_tag.get_text(strip=True) if title_tag else "No title"
-            result.append({"url": href, "title": title})
+VIDEO_LINK_CSS = 'a[href*="/video/"]'
 
-    seen = set()
-    clean_result = []
-    for item in result:
-        if item["url"] not in seen:
-            seen.add(item["url"])
-            clean_result.append(item)
-    return clean_result
+# Page text read by the verify-page check before giving up (see utils.readiness.VERIFY_PAGE_JS).
+VERIFY_SCAN_CHARS = 20000
+
+# Explore and search page XHRs that carry item structs (``itemList``/``item_list``) while scrolling.
+FEED_API_RE = re.compile(r"/api/(?:[\w/]*item_list|search/[\w/]*full)")
+
+
+def fetch_explore_page_html(url: Optional[str] = None) -> str:
+    """打开 TikTok 发现页并返回 HTML（基于 Playwright）。"""
+    url = url or explore_url()
+    return get_page_content(url=url, wait_ms=6000, headless=True)
 
 
-def fetch_explore_links(wait_ms: int = 9000, headless: bool = False) -> List[Dict[str, str]]:
+def fetch_explore_links(
+    wait_ms: int = 9000, headless: bool = False, base_url: Optional[str] = None
+) -> List[Dict[str, str]]:
     """Use Playwright to extract explore video links and titles directly from the live DOM.
 
-    - Waits for page load and a short delay
+    - Waits for page load until video links render and stop growing (at most ``wait_ms``)
     - Performs a gentle scroll to trigger lazy content
     - Queries anchors with href containing '/video/' and attempts to read nearby title
+    - base_url: site root to scrape instead of TIKTOK_BASE_URL (e.g. a fixture server)
     """
-    url = "https://www.tiktok.com/explore?lang=cn"
-    with create_page(headless=headless) as page:
+    url = explore_url(base_url)
+    with create_page(headless=headless, profile="explore") as page:
         page.goto(url, wait_until="load", timeout=60_000)
         maybe_accept_cookies(page)
-        page.wait_for_timeout(wait_ms)
+        wait_for_stable_count(page, VIDEO_LINK_CSS, timeout_ms=wait_ms, kind="explore_initial")
         # Gentle scroll to trigger lazy loading
         for _ in range(3):
             page.mouse.wheel(0, 1200)
-            page.wait_for_timeout(800)
-
-        js = """
-        () => {
-          const anchors = Array.from(document.querySelectorAll('a[href*="/video/"]'));
-          const items = anchors.map(a => {
-            const href = a.getAttribute('href');
-            const titleEl = a.querySelector('[data-e2e="video-title"], strong, span');
-            const title = (titleEl && titleEl.textContent) ? titleEl.textContent.trim() : '';
-            return { url: href, title: title || 'No title' };
-          });
-          // de-duplicate by url
-          const seen = new Set();
-          const dedup = [];
-          for (const it of items) {
-            if (!it.url || seen.has(it.url)) continue;
-            seen.add(it.url);
-            dedup.push(it);
-          }
-          return dedup;
-        }
-        """
-        data = page.evaluate(js)
+            wait_for_explore_scroll(page, timeout_ms=800)
+
+        data = call_page_api(page, "exploreLinks")
         return data or []
 
 
@@ -84,29 +88,29 @@ def save_debug_html(html: str, path: str = "tiktok_explore_debug.html") -> str:
 
 
 def maybe_accept_cookies(page: Page) -> None:
-    try:
-        page.evaluate(
-            """
-            () => {
-              const btn = document.querySelector('[data-e2e="cookie-banner-accept-button"]') ||
-                          Array.from(document.querySelectorAll('button, div[role="button"]'))
-                               .find(b => /accept all|同意|允许|同意所有/i.test(b.textContent || ''));
-              if (btn) btn.click();
-            }
-            """
-        )
-    except Exception:
-        pass
+    # A restored session already carries the consent cookie; no banner to look for.
+    if session_consented(page):
+        return
+    with stage("accept_cookies"):
+        try:
+            clicked = call_page_api(page, "acceptCookies")
+        except Exception:
+            clicked = False
+    if clicked:
+        mark_session_consented(page)
 
 
-def wait_for_initial_data(page: Page, timeout_ms: int = 8000) -> None:
-    try:
-        page.wait_for_function(
-            "() => (window.SIGI_STATE && window.SIGI_STATE.ItemModule) || document.querySelector('#__NEXT_DATA__') || document.querySelector('script[type=\"application/ld+json\"]')",
-            timeout=timeout_ms,
-        )
-    except Exception:
-        pass
+def wait_for_initial_data(page: Page, timeout_ms: int = 8000) -> ReadyResult:
+    """Wait until a video page exposes its embedded state; returns the timed result."""
+    return wait_until_ready(page, "video", timeout_ms=timeout_ms)
+
+
+def wait_for_explore_scroll(page: Page, timeout_ms: int = 1500) -> ReadyResult:
+    """After a scroll, wait for feed requests to settle and the link count to stop growing."""
+    started = time.monotonic()
+    wait_for_network_quiet(page, FEED_API_RE, timeout_ms=timeout_ms, quiet_ms=250, kind="explore_feed")
+    remaining = max(0, int(timeout_ms - (time.monotonic() - started) * 1000))
+    return wait_for_stable_count(page, VIDEO_LINK_CSS, timeout_ms=remaining, quiet_ms=250, kind="explore_scroll")
 
 
 if __name__ == "__main__":
@@ -135,176 +139,503 @@ def extract_video_metadata(page) -> Dict[str, object]:
       - webVideoUrl
       - downloadUrl (best-effort)
     """
-    js = (
-        """
-        () => {
-          function parseStateFromScript(txt) {
-            if (!txt) return null;
-            try { return JSON.parse(txt); } catch (e) {}
-            try {
-              const cleaned = txt
-                .replace(/^\s*window\.(?:SIGI_STATE)\s*=\s*/i, '')
-                .replace(/^\s*window\[["']SIGI_STATE["']\]\s*=\s*/i, '')
-                .replace(/;\s*$/, '');
-              return JSON.parse(cleaned);
-            } catch (e) {}
-            try { return (new Function('var window={}; return (' + txt + ')'))(); } catch (e) {}
-            return null;
-          }
-
-          function fillFromItem(item, state, result) {
-            if (!item) return false;
-            result.webVideoUrl = location.href;
-            result.text = item.desc || item.title || '';
-            const stats = item.stats || {};
-            result.diggCount = stats.diggCount || 0;
-            result.shareCount = stats.shareCount || 0;
-            result.playCount = stats.playCount || 0;
-            result.commentCount = stats.commentCount || 0;
-            result.collectCount = stats.collectCount || 0;
-            const video = item.video || {};
-            result["videoMeta.duration"] = (video && (video.duration || video.videoMeta?.duration)) ?? null;
-            const music = item.music || {};
-            result["musicMeta.musicName"] = music.title || music.musicName || '';
-            result["musicMeta.musicAuthor"] = music.authorName || music.musicAuthor || '';
-            result["musicMeta.musicOriginal"] = !!(music.original ?? music.musicOriginal);
-            const authorName = item.author || item.author?.uniqueId || '';
-            result["authorMeta.name"] = authorName || (item.author && (item.author.uniqueId || item.author.nickname)) || '';
-            const users = (state && state.UserModule && state.UserModule.users) || {};
-            const u = users[authorName] || (item.author || {}) || Object.values(users)[0];
-            result["authorMeta.avatar"] = (u && (u.avatarLarger || u.avatarThumb || u.avatarMedium)) || '';
-            if (item.createTime) {
-              const ts = Number(item.createTime) * 1000;
-              if (!Number.isNaN(ts)) { try { result.createTimeISO = new Date(ts).toISOString(); } catch {}
-              }
-            }
-            // choose download url
-            const bitrateInfo = Array.isArray(video.bitrateInfo) ? video.bitrateInfo : [];
-            const bi0 = bitrateInfo[0] || {};
-            let cand = video.downloadAddr || video.playAddr || bi0.PlayAddr || bi0.playAddr || '';
-            const pickFromObj = (obj) => {
-              if (!obj) return '';
-              if (typeof obj === 'string') return obj;
-              if (obj.UrlList && obj.UrlList.length) return obj.UrlList[0];
-              if (obj.url_list && obj.url_list.length) return obj.url_list[0];
-              if (Array.isArray(obj) && obj.length) return obj[0];
-              return '';
-            };
-            if (typeof cand !== 'string') cand = pickFromObj(cand);
-            if (!cand) cand = pickFromObj(video.downloadAddr) || pickFromObj(video.playAddr) || pickFromObj(bi0.PlayAddr) || pickFromObj(bi0.playAddr);
-            result.downloadUrl = cand || '';
-            if (!result.downloadUrl) {
-              const v = document.querySelector('video');
-              if (v && v.src) result.downloadUrl = v.src;
-            }
-            return true;
-          }
-
-          const result = {};
-          // 1) Try SIGI_STATE
-          let state = (window.SIGI_STATE) ? window.SIGI_STATE : null;
-          if (!state) {
-            const stateScript = document.querySelector('#SIGI_STATE') || document.querySelector('script[id*="SIGI"]');
-            const jsonTxt = stateScript ? stateScript.textContent : '';
-            state = parseStateFromScript(jsonTxt);
-          }
-          if (state && state.ItemModule) {
-            const items = Object.values(state.ItemModule);
-            if (items && items.length) {
-              if (fillFromItem(items[0], state, result)) return result;
-            }
-          }
-
-          // 2) Try Next.js data
-          try {
-            const nextEl = document.querySelector('#__NEXT_DATA__');
-            if (nextEl && nextEl.textContent) {
-              const next = JSON.parse(nextEl.textContent);
-              const pp = next && next.props && next.props.pageProps;
-              const item = (pp && pp.itemInfo && pp.itemInfo.itemStruct) || (pp && pp.videoData && pp.videoData.itemInfos) || null;
-              if (item && fillFromItem(item, null, result)) return result;
-            }
-          } catch (e) {}
-
-          // 3) Try LD+JSON
-          try {
-            const scripts = Array.from(document.querySelectorAll('script[type="application/ld+json"]'));
-            const objs = scripts.map(s => { try { return JSON.parse(s.textContent); } catch(e) { return null; } }).filter(Boolean);
-            const vid = objs.find(o => o['@type'] && (String(o['@type']).toLowerCase().includes('video')));
-            if (vid) {
-              result.webVideoUrl = location.href;
-              result.text = vid.description || vid.name || '';
-              // Basic counts if present
-              if (Array.isArray(vid.interactionStatistic)) {
-                for (const st of vid.interactionStatistic) {
-                  const t = (st.interactionType && (st.interactionType['@type'] || st.interactionType.name || st.interactionType)) || '';
-                  const c = Number(st.userInteractionCount || 0);
-                  if (/like/i.test(t)) result.diggCount = c;
-                  if (/comment/i.test(t)) result.commentCount = c;
-                  if (/share/i.test(t)) result.shareCount = c;
-                  if (/play|view/i.test(t)) result.playCount = c;
-                }
-              }
-              result["videoMeta.duration"] = vid.duration || result["videoMeta.duration"] || null;
-              if (vid.uploadDate) {
-                try { result.createTimeISO = new Date(vid.uploadDate).toISOString(); } catch {}
-              }
-              result["authorMeta.name"] = (vid.author && (vid.author.name || vid.author)) || result["authorMeta.name"] || '';
-              result.downloadUrl = vid.contentUrl || vid.embedUrl || result.downloadUrl || '';
-              return result;
-            }
-          } catch (e) {}
-
-          // 4) Minimal OG fallback
-          try {
-            result.webVideoUrl = location.href;
-            const og = (p) => (document.querySelector(`meta[property="${p}"]`) || {}).content || '';
-            const name = og('og:title') || '';
-            const desc = (document.querySelector('meta[name="description"]') || {}).content || '';
-            result.text = desc || name;
-            result.downloadUrl = og('og:video') || og('og:video:secure_url') || '';
-          } catch (e) {}
-
-          return result;
-        }
-        """
+    with stage("extract_evaluate"):
+        result = call_page_api(page, "extract")
+    count(EXTRACT_TIER, tier=result.pop("_tier", "og"), source="browser")
+    return result
+
+
+def _raise_if_verify(page: Page, url: str, source: str) -> None:
+    try:
+        verify = bool(call_page_api(page, "isVerify", VERIFY_SCAN_CHARS))
+    except Exception:
+        verify = False
+    if verify:
+        count(VERIFY_PAGES, source=source)
+        raise VerifyPageError(url)
+
+
+def _visit_once(page: Page, href: str) -> Dict[str, object]:
+    with stage("goto_video"):
+        page.goto(href, wait_until="load", timeout=60_000)
+    # Bail out before the readiness wait, which a verify page would run to its timeout.
+    _raise_if_verify(page, href, "browser")
+    maybe_accept_cookies(page)
+    # Wait for SIGI state or other data scripts to load (returns as soon as present)
+    wait_for_initial_data(page, timeout_ms=9000)
+    meta = extract_video_metadata(page)
+    # Ensure webVideoUrl and fallback if missing
+    if not meta.get("webVideoUrl"):
+        meta["webVideoUrl"] = href
+    return meta
+
+
+def _visit_and_extract(page: Page, href: str) -> Optional[Dict[str, object]]:
+    """Navigate ``page`` to a video URL and extract its metadata.
+
+    Runs under the host scheduler (utils.scheduler): rate-limited, retried
+    with backoff on transient errors (not on timeouts), and on a verify
+    page the page's session is rotated. Returns None when every attempt failed (see _cache_result()).
+    """
+    try:
+        return get_scheduler().run(
+            href,
+            lambda: _visit_once(page, href),
+            on_verify=lambda _tripped: rotate_session(page.context),
+            # A goto timeout already spent its 60s; retrying would stall every link queued behind it.
+            give_up_on=(PlaywrightTimeoutError,),
+        )
+    except VerifyPageError:
+        count(FALLBACKS, kind="url_only")
+        return None
+    except PlaywrightTimeoutError:
+        count(TIMEOUTS, stage="goto_video")
+        count(FALLBACKS, kind="url_only")
+        return None
+    except Exception:
+        count(FALLBACKS, kind="url_only")
+        return None
+
+
+def fetch_video_metadata_http(href: str, timeout: float = 15.0) -> Optional[Dict[str, object]]:
+    """Browserless fast path: fetch the video page over HTTP and parse it in Python.
+
+    Returns None when the response carries no embedded state (SIGI_STATE or
+    __NEXT_DATA__), e.g. a verify page or JS shell, so callers can fall back
+    to a real browser.
+    """
+    scheduler = get_scheduler()
+    try:
+        scheduler.acquire(href)
+    except BreakerOpenError:
+        count(FALLBACKS, kind="http_to_browser")
+        return None
+    try:
+        with stage("http_fetch"):
+            html = fetch_html(href, timeout=timeout)
+    except Exception:
+        count(FALLBACKS, kind="http_to_browser")
+        return None
+    if is_verify_html(html):
+        count(VERIFY_PAGES, source="http")
+        scheduler.report_verify(href)
+        count(FALLBACKS, kind="http_to_browser")
+        return None
+    with stage("http_parse"):
+        meta, tier = extract_video_metadata_from_html(html, href)
+    if tier not in STATE_TIERS:
+        count(FALLBACKS, kind="http_to_browser")
+        return None
+    scheduler.report_success(href)
+    count(EXTRACT_TIER, tier=tier, source="http")
+    return meta
+
+
+def _extract_on_own_page(href: str, headless: bool, http_first: bool = False) -> Optional[Dict[str, object]]:
+    if http_first:
+        meta = fetch_video_metadata_http(href)
+        if meta is not None:
+            return meta
+    with create_page(headless=headless, profile="video") as page:
+        return _visit_and_extract(page, href)
+
+
+def _cache_result(
+    cache: Optional[MetadataCache], href: str, meta: Optional[Dict[str, object]]
+) -> Tuple[Dict[str, object], bool]:
+    """Return ``(record, extracted)`` for an extraction outcome and cache fresh records.
+
+    ``meta`` is None when extraction failed: the record is then
+    ``{"webVideoUrl": href}``, filled in with cached static fields if any,
+    and ``extracted`` is False.
+    """
+    vid = video_id_from_url(href)
+    if meta is not None:
+        if cache is not None and vid:
+            cache.put(vid, meta)
+        return meta, True
+    static = cache.get_static(vid) if cache is not None and vid else None
+    return (dict(static, webVideoUrl=href) if static else {"webVideoUrl": href}), False
+
+
+class FeedCapture:
+    """Collect item-list JSON responses fetched by a page while it scrolls.
+
+    Responses are only recorded inside the event handler; their bodies are
+    read later from the scraper's own flow, which is safe with the sync API.
+    """
+
+    def __init__(self, page: Page, base_url: Optional[str] = None):
+        self.page = page
+        self.base_url = base_url
+        self._responses = []
+        self.records: Dict[str, Dict[str, object]] = {}
+        page.on("response", self._on_response)
+
+    def _on_response(self, response) -> None:
+        if FEED_API_RE.search(response.url) and response.request.resource_type in ("xhr", "fetch"):
+            self._responses.append(response)
+
+    def drain(self) -> Dict[str, Dict[str, object]]:
+        """Parse pending responses into records keyed by video ID."""
+        pending, self._responses = self._responses, []
+        if pending:
+            with stage("feed_drain"):
+                return self._parse(pending)
+        return self.records
+
+    def _parse(self, pending) -> Dict[str, Dict[str, object]]:
+        for response in pending:
+            try:
+                payload = response.json()
+            except Exception:
+                continue
+            for item in items_from_feed_payload(payload):
+                self.records.setdefault(
+                    str(item["id"]), item_to_record(item, web_url=video_url(item, self.base_url))
+                )
+        return self.records
+
+    def close(self) -> None:
+        try:
+            self.page.remove_listener("response", self._on_response)
+        except Exception:
+            pass
+
+
+def open_video_grid(page: Page, url: str, kind: str = "explore") -> None:
+    """Navigate to a page of video cards (explore, search) and wait until its first links render.
+
+    A verify page is retried under the host scheduler with a rotated session.
+    """
+
+    def goto() -> None:
+        with stage(f"goto_{kind}"):
+            page.goto(url, wait_until="load", timeout=60_000)
+        _raise_if_verify(page, url, kind)
+
+    try:
+        get_scheduler().run(url, goto, retry_on=(), on_verify=lambda _tripped: rotate_session(page.context))
+    except VerifyPageError:
+        pass  # still blocked: harvesting below finds nothing and stops
+    maybe_accept_cookies(page)
+    wait_for_stable_count(page, VIDEO_LINK_CSS, timeout_ms=6000, kind=f"{kind}_initial")
+
+
+def open_explore(page: Page, base_url: Optional[str] = None) -> None:
+    """Navigate to the explore page and wait until its first video links render."""
+    open_video_grid(page, explore_url(base_url), kind="explore")
+
+
+def iter_explore_links(
+    page: Page,
+    number: int,
+    max_scrolls: int = 50,
+    max_stalls: int = 3,
+    before_read: Optional[Callable[[], object]] = None,
+    accept: Optional[Callable[[str], bool]] = None,
+) -> Iterator[str]:
+    """Yield unique video links from an open explore page as they appear.
+
+    Scrolls only until ``number`` links were yielded. Stops early at the end
+    of the feed: ``max_stalls`` scrolls in a row that neither add links nor
+    grow the page. ``before_read`` runs before each batch of links is read
+    (e.g. FeedCapture.drain, so captured records are ready for those links).
+    Links for which ``accept`` returns False are skipped and not counted.
+    """
+    call_page_api(page, "harvestInstall")
+    offset = 0
+    yielded = 0
+    stalls = 0
+    last_height = -1
+    for scroll in range(max_scrolls + 1):
+        if before_read is not None:
+            before_read()
+        batch = call_page_api(page, "harvestRead", offset)
+        offset += len(batch["links"])
+        for href in batch["links"]:
+            if accept is not None and not accept(href):
+                continue
+            yield href
+            yielded += 1
+            if yielded >= number:
+                return
+        if batch["links"] or batch["height"] != last_height:
+            stalls = 0
+        else:
+            stalls += 1
+            if stalls >= max_stalls:
+                return
+        last_height = batch["height"]
+        if scroll == max_scrolls:
+            return
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        wait_for_explore_scroll(page, timeout_ms=1500)
+
+
+def _explore_links(
+    page: Page, number: int, feed: Optional[FeedCapture], accept: Optional[Callable[[str], bool]] = None
+) -> Iterator[str]:
+    """Harvested explore links, topped up with feed-only videos when capturing."""
+    seen = set()
+    taken = 0
+    before_read = feed.drain if feed is not None else None
+    for href in iter_explore_links(page, number, before_read=before_read, accept=accept):
+        seen.add(video_id_from_url(href))
+        taken += 1
+        yield href
+    if feed is None:
+        return
+    # The feed may describe videos whose anchors are not rendered yet.
+    for vid, record in list(feed.drain().items()):
+        if taken >= number:
+            return
+        if vid not in seen:
+            seen.add(vid)
+            if accept is not None and not accept(record["webVideoUrl"]):
+                continue
+            taken += 1
+            yield record["webVideoUrl"]
+
+
+def _known_record(
+    href: str, captured: Dict[str, Dict[str, object]], cache: Optional[MetadataCache]
+) -> Optional[Dict[str, object]]:
+    """Return a cached or fully captured record for ``href``, or None if it must be visited.
+
+    A captured record that lacks some fields still refreshes the counters
+    of a cached record whose static fields are fresh.
+    """
+    vid = video_id_from_url(href) or ""
+    record = cache.get(vid) if cache is not None and vid else None
+    if record is not None:
+        count(EXTRACT_TIER, tier="cache", source="cache")
+        return dict(record, webVideoUrl=href)
+    record = captured.get(vid)
+    if record is None:
+        return None
+    if is_complete_record(record):
+        count(EXTRACT_TIER, tier="feed", source="feed")
+        record, _extracted = _cache_result(cache, href, dict(record, webVideoUrl=href))
+        return dict(record, webVideoUrl=href)
+    # Feed items default missing stats to 0; only trust them if any are set.
+    refreshed = None
+    if cache is not None and vid and any(record.get(k) for k in STATS_FIELDS):
+        refreshed = cache.refresh_stats(vid, record)
+    if refreshed is None:
+        return None
+    count(EXTRACT_TIER, tier="feed_stats", source="feed")
+    return dict(refreshed, webVideoUrl=href)
+
+
+def iter_explore_items(
+    number: int = 10,
+    headless: bool = True,
+    concurrency: int = 1,
+    capture: bool = False,
+    http_first: bool = False,
+    use_cache: bool = True,
+    base_url: Optional[str] = None,
+    processes: int = 0,
+    only_new: bool = False,
+) -> Iterator[Dict[str, object]]:
+    """Generator version of collect_explore_items(): yields each record, in
+    link order, as soon as it is available. Arguments are the same.
+
+    With concurrency > 1, links are handed to the extraction threads while
+    the explore page is still being scrolled. When the crawl frontier is in
+    use (only_new, or enabled via utils.frontier.frontier_enabled()) every
+    yielded video is recorded in it.
+    """
+    frontier = get_frontier() if only_new or frontier_enabled() else None
+
+    def _due(href: str) -> bool:
+        return frontier.is_due(video_id_from_url(href) or "")
+
+    accept = _due if only_new else None
+
+    if processes > 0:
+        records = _iter_explore_items_sharded(
+            number, headless, capture, http_first, use_cache, base_url, processes, accept
+        )
+    else:
+        records = _iter_explore_items(number, headless, concurrency, capture, http_first, use_cache, base_url, accept)
+    try:
+        for record, extracted in records:
+            if frontier is not None:
+                # A failed extraction is seen but not refreshed, so only_new retries it next run.
+                frontier.mark(video_id_from_url(record.get("webVideoUrl") or "") or "", refreshed=extracted)
+            yield record
+    finally:
+        records.close()
+        if frontier is not None:
+            frontier.flush()
+
+
+def resolve_links(
+    links: Iterable[str],
+    captured: Dict[str, Dict[str, object]],
+    headless: bool = True,
+    concurrency: int = 2,
+    http_first: bool = False,
+    cache: Optional[MetadataCache] = None,
+) -> Iterator[Dict[str, object]]:
+    """Records for ``links`` in input order, extracting on ``concurrency`` warm pages.
+
+    Links with a fresh cache entry or a complete ``captured`` feed record are
+    not visited. ``links`` is consumed lazily, so it can still be harvesting.
+    """
+    records = _resolve_links(links, captured, headless, concurrency, http_first, cache)
+    try:
+        for record, _extracted in records:
+            yield record
+    finally:
+        records.close()
+
+
+def _resolve_links(
+    links: Iterable[str],
+    captured: Dict[str, Dict[str, object]],
+    headless: bool,
+    concurrency: int,
+    http_first: bool,
+    cache: Optional[MetadataCache],
+) -> Iterator[Tuple[Dict[str, object], bool]]:
+    """resolve_links() as ``(record, extracted)`` pairs (see _cache_result())."""
+
+    def resolve(href: str) -> Tuple[Dict[str, object], bool]:
+        record = _known_record(href, captured, cache)
+        if record is not None:
+            return record, True
+        return _cache_result(cache, href, _extract_on_own_page(href, headless, http_first))
+
+    records = imap_in_browser_threads(resolve, links, concurrency)
+    try:
+        yield from records
+    finally:
+        records.close()
+
+
+def _iter_explore_items(
+    number: int,
+    headless: bool,
+    concurrency: int,
+    capture: bool,
+    http_first: bool,
+    use_cache: bool,
+    base_url: Optional[str],
+    accept: Optional[Callable[[str], bool]],
+) -> Iterator[Tuple[Dict[str, object], bool]]:
+    """Explore records as ``(record, extracted)`` pairs (see _cache_result())."""
+    cache = get_cache() if use_cache else None
+    with create_page(headless=headless, profile="explore") as page:
+        feed = FeedCapture(page, base_url) if capture else None
+        try:
+            open_explore(page, base_url)
+            links = _explore_links(page, number, feed, accept)
+            captured = feed.records if feed is not None else {}
+
+            if concurrency <= 1:
+                # Visiting videos navigates away from explore, so finish harvesting first.
+                links = list(links)
+                if feed is not None:
+                    feed.close()
+                for href in links:
+                    record = _known_record(href, captured, cache)
+                    if record is not None:
+                        yield record, True
+                        continue
+                    meta = fetch_video_metadata_http(href) if http_first else None
+                    if meta is None:
+                        meta = _visit_and_extract(page, href)
+                    yield _cache_result(cache, href, meta)
+                return
+
+            records = _resolve_links(links, captured, headless, concurrency, http_first, cache)
+            try:
+                yield from records
+            finally:
+                records.close()
+        finally:
+            if feed is not None:
+                feed.close()
+
+
+def _iter_explore_items_sharded(
+    number: int,
+    headless: bool,
+    capture: bool,
+    http_first: bool,
+    use_cache: bool,
+    base_url: Optional[str],
+    processes: int,
+    accept: Optional[Callable[[str], bool]],
+) -> Iterator[Tuple[Dict[str, object], bool]]:
+    """_iter_explore_items() with unknown videos extracted across worker processes."""
+    cache = get_cache() if use_cache else None
+    with create_page(headless=headless, profile="explore") as page:
+        feed = FeedCapture(page, base_url) if capture else None
+        try:
+            open_explore(page, base_url)
+            links = list(_explore_links(page, number, feed, accept))
+        finally:
+            if feed is not None:
+                feed.close()
+    captured = feed.records if feed is not None else {}
+
+    known = {href: _known_record(href, captured, cache) for href in links}
+    pending = [href for href in links if known[href] is None]
+    # Each worker process reuses its own warm browser across the hrefs of its shards.
+    extract = partial(_extract_on_own_page, headless=headless, http_first=http_first)
+    extracted = imap_sharded(
+        extract, pending, processes=processes, on_error=lambda href, exc: None
     )
-    return page.evaluate(js)
+    for href in links:
+        record = known[href]
+        yield (record, True) if record is not None else _cache_result(cache, href, next(extracted))
 
 
-def collect_explore_items(number: int = 10, headless: bool = True) -> List[Dict[str, object]]:
+def collect_explore_items(
+    number: int = 10,
+    headless: bool = True,
+    concurrency: int = 1,
+    capture: bool = False,
+    http_first: bool = False,
+    use_cache: bool = True,
+    base_url: Optional[str] = None,
+    processes: int = 0,
+    only_new: bool = False,
+) -> List[Dict[str, object]]:
     """Open explore page, collect video URLs, then visit and extract rich metadata.
 
     - number: max number of videos to return
     - headless: pass to Playwright
+    - concurrency: 1 visits videos one by one on the explore page; >1 fans the
+      links out over that many warm pages (output order is preserved)
+    - capture: build records from the item-list API responses the explore page
+      fetches while scrolling; only videos the feed did not fully describe are
+      visited
+    - http_first: try a plain HTTP fetch + Python parse per video before
+      falling back to a browser navigation
+    - use_cache: serve fresh records from the metadata cache (utils.cache)
+      without visiting them, and store newly extracted ones
+    - base_url: site root to scrape instead of TIKTOK_BASE_URL (e.g. a fixture server)
+    - processes: >0 extracts the videos in that many worker processes
+      (utils.workers), each with its own warm browser; concurrency is ignored
+    - only_new: return only videos no earlier run has seen, plus seen ones
+      whose stats are due for a refresh (TIKTOK_FRONTIER_REFRESH); scrolling
+      continues past already-seen videos until ``number`` are found
     """
-    url = "https://www.tiktok.com/explore?lang=cn"
-    items: List[Dict[str, object]] = []
-    with create_page(headless=headless) as page:
-        page.goto(url, wait_until="load", timeout=60_000)
-        maybe_accept_cookies(page)
-        page.wait_for_timeout(6000)
-        for _ in range(3):
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            page.wait_for_timeout(1500)
-        links: List[str] = page.eval_on_selector_all(
-            'a[href*="/video/"]',
-            'els => Array.from(new Set(els.map(e => e.href).filter(Boolean)))',
+    return list(
+        iter_explore_items(
+            number=number,
+            headless=headless,
+            concurrency=concurrency,
+            capture=capture,
+            http_first=http_first,
+            use_cache=use_cache,
+            base_url=base_url,
+            processes=processes,
+            only_new=only_new,
         )
-        links = links[:number]
-
-        for href in links:
-            try:
-                page.goto(href, wait_until="load", timeout=60_000)
-                maybe_accept_cookies(page)
-                # Wait for SIGI state or other data scripts to load
-                wait_for_initial_data(page, timeout_ms=9000)
-                page.wait_for_timeout(3000)
-                meta = extract_video_metadata(page)
-                # Ensure webVideoUrl and fallback if missing
-                if not meta.get("webVideoUrl"):
-                    meta["webVideoUrl"] = href
-                items.append(meta)
-            except Exception:
-                items.append({"webVideoUrl": href})
-    return items
+    )
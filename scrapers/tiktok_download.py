@@ -0,0 +1,233 @@
+"""Fetch the media behind extracted ``downloadUrl`` fields.
+
+Videos are streamed to ``<out_dir>/<video id>.mp4`` in fixed-size chunks
+over the shared HTTP session, so memory per download stays bounded. A
+download first lands in ``<id>.mp4.part`` and is resumed with a Range
+request after an interruption; a finished ``<id>.mp4`` is never fetched
+again. One process-wide Downloader caps concurrent downloads and total
+bandwidth.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urljoin
+
+import requests
+
+from scrapers.tiktok_parse import BASE_URL, video_id_from_url
+from utils.http import get_session
+from utils.metrics import DOWNLOAD_BYTES, DOWNLOADS, count, stage
+from utils.ratelimit import TokenBucket
+
+
+CHUNK_SIZE = 64 * 1024
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)")
+
+
+def _total_size(resp: requests.Response, offset: int) -> Optional[int]:
+    """Full media size from Content-Range (206/416) or Content-Length (200)."""
+    m = _CONTENT_RANGE_RE.match(resp.headers.get("Content-Range", ""))
+    if m and m.group(2) != "*":
+        return int(m.group(2))
+    length = resp.headers.get("Content-Length")
+    if length and length.isdigit():
+        return offset + int(length) if resp.status_code == 206 else int(length)
+    return None
+
+
+class Downloader:
+    """Concurrent, resumable media downloader with a global bandwidth cap.
+
+    - concurrency: downloads in flight at once
+    - max_bytes_per_sec: total bandwidth across all downloads, 0 = unlimited
+    - retries: extra attempts per video; each resumes from the partial file
+    """
+
+    def __init__(
+        self,
+        out_dir: str = "downloads",
+        concurrency: int = 4,
+        max_bytes_per_sec: float = 0,
+        chunk_size: int = CHUNK_SIZE,
+        timeout: float = 30.0,
+        retries: int = 2,
+    ):
+        self.out_dir = out_dir
+        self.concurrency = max(1, concurrency)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.retries = retries
+        self.bucket = TokenBucket(max_bytes_per_sec, capacity=max(max_bytes_per_sec, chunk_size))
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="download")
+        self._inflight = set()
+        self._lock = threading.Lock()
+        os.makedirs(out_dir, exist_ok=True)
+
+    def path_for(self, video_id: str) -> str:
+        return os.path.join(self.out_dir, f"{video_id}.mp4")
+
+    def download(self, record: Dict[str, object]) -> Dict[str, object]:
+        """Download one record's media; returns ``{"id", "path", "status", "bytes", ...}``.
+
+        status is one of downloaded, resumed, exists, duplicate, no_url or failed.
+        """
+        web_url = str(record.get("webVideoUrl") or "")
+        vid = video_id_from_url(web_url) or ""
+        media_url = str(record.get("downloadUrl") or "")
+        result: Dict[str, object] = {"id": vid, "path": self.path_for(vid) if vid else None, "bytes": 0}
+        if not vid or not media_url:
+            result["status"] = "no_url"
+        elif os.path.exists(result["path"]):
+            result["status"] = "exists"
+        else:
+            with self._lock:
+                duplicate = vid in self._inflight
+                self._inflight.add(vid)
+            if duplicate:
+                result["status"] = "duplicate"
+            else:
+                try:
+                    with stage("download"):
+                        self._fetch(urljoin(web_url or BASE_URL, media_url), web_url, result)
+                finally:
+                    with self._lock:
+                        self._inflight.discard(vid)
+        count(DOWNLOADS, status=result["status"])
+        return result
+
+    def _fetch(self, url: str, referer: str, result: Dict[str, object]) -> None:
+        final = str(result["path"])
+        part = final + ".part"
+        started = time.perf_counter()
+        resumed = False
+        for attempt in range(self.retries + 1):
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            resumed = resumed or offset > 0
+            try:
+                self._stream(url, referer, part, offset, result)
+                break
+            except (requests.RequestException, OSError) as e:
+                if attempt == self.retries:
+                    result["status"] = "failed"
+                    result["error"] = str(e)
+                    return
+        os.replace(part, final)
+        result["status"] = "resumed" if resumed else "downloaded"
+        result["ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    def _stream(self, url: str, referer: str, part: str, offset: int, result: Dict[str, object]) -> None:
+        """Append the bytes after ``offset`` to ``part``, adding them to ``result["bytes"]``."""
+        headers = {"Accept": "*/*", "Referer": referer or BASE_URL}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        written = 0
+        with get_session().get(url, headers=headers, stream=True, timeout=self.timeout) as resp:
+            if resp.status_code == 416 and offset and _total_size(resp, offset) == offset:
+                return  # the partial file was already complete
+            resp.raise_for_status()
+            if resp.status_code != 206:
+                offset = 0  # server ignored the Range header: start over
+            total = _total_size(resp, offset)
+            with open(part, "ab" if offset else "wb") as f:
+                for chunk in resp.iter_content(self.chunk_size):
+                    self.bucket.acquire(len(chunk))
+                    f.write(chunk)
+                    written += len(chunk)
+                    result["bytes"] = int(result["bytes"]) + len(chunk)
+                    DOWNLOAD_BYTES.inc(len(chunk))
+        if total is not None and offset + written != total:
+            raise OSError(f"short read: {offset + written} of {total} bytes")
+
+    def download_all(self, records: Iterable[Dict[str, object]]) -> Iterator[Dict[str, object]]:
+        """Download ``records`` concurrently, yielding results in input order.
+
+        ``records`` is consumed lazily, so it can be iter_explore_items() and
+        downloads start while later videos are still being extracted.
+        """
+        window: Deque = deque()
+        for record in records:
+            window.append(self._executor.submit(self.download, record))
+            if len(window) >= self.concurrency * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+_downloader: Optional[Downloader] = None
+_downloader_lock = threading.Lock()
+
+
+def get_downloader() -> Downloader:
+    """Process-wide downloader, configured from the environment.
+
+    - TIKTOK_DOWNLOAD_DIR: output directory (default downloads)
+    - TIKTOK_DOWNLOAD_CONCURRENCY: concurrent downloads (default 4)
+    - TIKTOK_DOWNLOAD_BPS: total bytes/second, 0 = unlimited (default 0)
+    """
+    global _downloader
+    with _downloader_lock:
+        if _downloader is None:
+            _downloader = Downloader(
+                out_dir=os.environ.get("TIKTOK_DOWNLOAD_DIR") or "downloads",
+                concurrency=int(os.environ.get("TIKTOK_DOWNLOAD_CONCURRENCY", 4)),
+                max_bytes_per_sec=float(os.environ.get("TIKTOK_DOWNLOAD_BPS", 0)),
+            )
+        return _downloader
+
+
+def download_videos(records: Iterable[Dict[str, object]]) -> List[Dict[str, object]]:
+    """Download the media of records from collect_explore_items() with the shared downloader."""
+    return list(get_downloader().download_all(records))
+
+
+def _read_records(path: str) -> Iterator[Dict[str, object]]:
+    """Records from a JSON array or NDJSON file ("-" for stdin)."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        text = f.read()
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    if text.lstrip().startswith("["):
+        yield from json.loads(text)
+        return
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            obj = json.loads(line)
+            if "webVideoUrl" in obj:  # skip a trailing timings/error line
+                yield obj
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Download the videos behind extracted TikTok records")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--records", help="JSON or NDJSON file of records (e.g. saved /tiktok/explore output), - for stdin")
+    src.add_argument("--explore", type=int, metavar="N", help="Scrape N explore videos first, then download them")
+    ap.add_argument("--out", default="downloads")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--max-bps", type=float, default=0, help="Total bandwidth cap in bytes/second (0 = unlimited)")
+    ap.add_argument("--base-url", default=None, help="Site root for --explore (e.g. a fixture server)")
+    args = ap.parse_args()
+
+    if args.records:
+        records: Iterable[Dict[str, object]] = _read_records(args.records)
+    else:
+        from scrapers.tiktok_base import iter_explore_items
+
+        records = iter_explore_items(number=args.explore, headless=True, base_url=args.base_url)
+    downloader = Downloader(out_dir=args.out, concurrency=args.concurrency, max_bytes_per_sec=args.max_bps)
+    for result in downloader.download_all(records):
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
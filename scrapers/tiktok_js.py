@@ -0,0 +1,264 @@
+"""Page-side JavaScript for the TikTok scrapers, installed once per browser context.
+
+Every helper here is a plain JS function expression. SCRAPER_API_JS bundles
+them into a frozen ``window.__scraper`` object; utils.browser adds it as an
+init script to each new context (see register_init_script), so it exists in
+every document before the page's own scripts run. ``call_page_api(page,
+name, arg)`` then sends only the function name and argument over CDP. When
+the API is missing (a context created before registration, a page that
+replaced it) the call falls back to evaluating the full source once.
+"""
+from typing import Dict
+
+from playwright.sync_api import Page
+
+from utils.browser import register_init_script
+from utils.metrics import FALLBACKS, count
+from utils.readiness import VERIFY_PAGE_JS
+
+
+# Bump when a helper's signature or result shape changes, so stale pages fall back.
+SCRAPER_API_VERSION = 1
+
+# Video links and their card titles from the live DOM, de-duplicated by URL.
+EXPLORE_LINKS_JS = r"""
+() => {
+  const anchors = Array.from(document.querySelectorAll('a[href*="/video/"]'));
+  const items = anchors.map(a => {
+    const href = a.getAttribute('href');
+    const titleEl = a.querySelector('[data-e2e="video-title"], strong, span');
+    const title = (titleEl && titleEl.textContent) ? titleEl.textContent.trim() : '';
+    return { url: href, title: title || 'No title' };
+  });
+  // de-duplicate by url
+  const seen = new Set();
+  const dedup = [];
+  for (const it of items) {
+    if (!it.url || seen.has(it.url)) continue;
+    seen.add(it.url);
+    dedup.push(it);
+  }
+  return dedup;
+}
+"""
+
+# Clicks the cookie banner's accept button if there is one; returns whether it did.
+ACCEPT_COOKIES_JS = r"""
+() => {
+  const btn = document.querySelector('[data-e2e="cookie-banner-accept-button"]') ||
+              Array.from(document.querySelectorAll('button, div[role="button"]'))
+                   .find(b => /accept all|同意|允许|同意所有/i.test(b.textContent || ''));
+  if (btn) btn.click();
+  return !!btn;
+}
+"""
+
+# Rich metadata from a video page: SIGI state, then Next.js data, LD+JSON and OG
+# tags. ``_tier`` in the result names the source that answered.
+EXTRACT_JS = r"""
+() => {
+  function parseStateFromScript(txt) {
+    if (!txt) return null;
+    try { return JSON.parse(txt); } catch (e) {}
+    try {
+      const cleaned = txt
+        .replace(/^\s*window\.(?:SIGI_STATE)\s*=\s*/i, '')
+        .replace(/^\s*window\[["']SIGI_STATE["']\]\s*=\s*/i, '')
+        .replace(/;\s*$/, '');
+      return JSON.parse(cleaned);
+    } catch (e) {}
+    return null;
+  }
+
+  function fillFromItem(item, state, result) {
+    if (!item) return false;
+    result.webVideoUrl = location.href;
+    result.text = item.desc || item.title || '';
+    const stats = item.stats || {};
+    result.diggCount = stats.diggCount || 0;
+    result.shareCount = stats.shareCount || 0;
+    result.playCount = stats.playCount || 0;
+    result.commentCount = stats.commentCount || 0;
+    result.collectCount = stats.collectCount || 0;
+    const video = item.video || {};
+    result["videoMeta.duration"] = (video && (video.duration || video.videoMeta?.duration)) ?? null;
+    const music = item.music || {};
+    result["musicMeta.musicName"] = music.title || music.musicName || '';
+    result["musicMeta.musicAuthor"] = music.authorName || music.musicAuthor || '';
+    result["musicMeta.musicOriginal"] = !!(music.original ?? music.musicOriginal);
+    const author = item.author;
+    const authorName = (author && typeof author === 'object') ? (author.uniqueId || author.nickname || '') : (author || '');
+    result["authorMeta.name"] = authorName;
+    const users = (state && state.UserModule && state.UserModule.users) || {};
+    const u = users[authorName] || (item.author || {}) || Object.values(users)[0];
+    result["authorMeta.avatar"] = (u && (u.avatarLarger || u.avatarThumb || u.avatarMedium)) || '';
+    if (item.createTime) {
+      const ts = Number(item.createTime) * 1000;
+      if (!Number.isNaN(ts)) { try { result.createTimeISO = new Date(ts).toISOString(); } catch {}
+      }
+    }
+    // choose download url
+    const bitrateInfo = Array.isArray(video.bitrateInfo) ? video.bitrateInfo : [];
+    const bi0 = bitrateInfo[0] || {};
+    let cand = video.downloadAddr || video.playAddr || bi0.PlayAddr || bi0.playAddr || '';
+    const pickFromObj = (obj) => {
+      if (!obj) return '';
+      if (typeof obj === 'string') return obj;
+      if (obj.UrlList && obj.UrlList.length) return obj.UrlList[0];
+      if (obj.url_list && obj.url_list.length) return obj.url_list[0];
+      if (Array.isArray(obj) && obj.length) return obj[0];
+      return '';
+    };
+    if (typeof cand !== 'string') cand = pickFromObj(cand);
+    if (!cand) cand = pickFromObj(video.downloadAddr) || pickFromObj(video.playAddr) || pickFromObj(bi0.PlayAddr) || pickFromObj(bi0.playAddr);
+    result.downloadUrl = cand || '';
+    if (!result.downloadUrl) {
+      const v = document.querySelector('video');
+      if (v && v.src) result.downloadUrl = v.src;
+    }
+    return true;
+  }
+
+  const result = {};
+  // 1) Try SIGI_STATE
+  let state = (window.SIGI_STATE) ? window.SIGI_STATE : null;
+  if (!state) {
+    const stateScript = document.querySelector('#SIGI_STATE') || document.querySelector('script[id*="SIGI"]');
+    const jsonTxt = stateScript ? stateScript.textContent : '';
+    state = parseStateFromScript(jsonTxt);
+  }
+  if (state && state.ItemModule) {
+    const items = Object.values(state.ItemModule);
+    if (items && items.length) {
+      if (fillFromItem(items[0], state, result)) { result._tier = 'sigi'; return result; }
+    }
+  }
+
+  // 2) Try Next.js data
+  try {
+    const nextEl = document.querySelector('#__NEXT_DATA__');
+    if (nextEl && nextEl.textContent) {
+      const next = JSON.parse(nextEl.textContent);
+      const pp = next && next.props && next.props.pageProps;
+      const item = (pp && pp.itemInfo && pp.itemInfo.itemStruct) || (pp && pp.videoData && pp.videoData.itemInfos) || null;
+      if (item && fillFromItem(item, null, result)) { result._tier = 'next_data'; return result; }
+    }
+  } catch (e) {}
+
+  // 3) Try LD+JSON
+  try {
+    const scripts = Array.from(document.querySelectorAll('script[type="application/ld+json"]'));
+    const objs = scripts.map(s => { try { return JSON.parse(s.textContent); } catch(e) { return null; } }).filter(Boolean);
+    const vid = objs.find(o => o['@type'] && (String(o['@type']).toLowerCase().includes('video')));
+    if (vid) {
+      result.webVideoUrl = location.href;
+      result.text = vid.description || vid.name || '';
+      // Basic counts if present
+      if (Array.isArray(vid.interactionStatistic)) {
+        for (const st of vid.interactionStatistic) {
+          const t = (st.interactionType && (st.interactionType['@type'] || st.interactionType.name || st.interactionType)) || '';
+          const c = Number(st.userInteractionCount || 0);
+          if (/like/i.test(t)) result.diggCount = c;
+          if (/comment/i.test(t)) result.commentCount = c;
+          if (/share/i.test(t)) result.shareCount = c;
+          if (/play|view/i.test(t)) result.playCount = c;
+        }
+      }
+      result["videoMeta.duration"] = vid.duration || result["videoMeta.duration"] || null;
+      if (vid.uploadDate) {
+        try { result.createTimeISO = new Date(vid.uploadDate).toISOString(); } catch {}
+      }
+      result["authorMeta.name"] = (vid.author && (vid.author.name || vid.author)) || result["authorMeta.name"] || '';
+      result.downloadUrl = vid.contentUrl || vid.embedUrl || result.downloadUrl || '';
+      result._tier = 'ld_json';
+      return result;
+    }
+  } catch (e) {}
+
+  // 4) Minimal OG fallback
+  try {
+    result.webVideoUrl = location.href;
+    const og = (p) => (document.querySelector(`meta[property="${p}"]`) || {}).content || '';
+    const name = og('og:title') || '';
+    const desc = (document.querySelector('meta[name="description"]') || {}).content || '';
+    result.text = desc || name;
+    result.downloadUrl = og('og:video') || og('og:video:secure_url') || '';
+  } catch (e) {}
+
+  result._tier = 'og';
+  return result;
+}
+"""
+
+
+# Installs a MutationObserver that keeps a running, de-duplicated, ordered list
+# of video links in window.__harvest as the grid renders them.
+HARVEST_INSTALL_JS = r"""
+() => {
+  if (window.__harvest) return window.__harvest.links.length;
+  const h = window.__harvest = { links: [], seen: new Set() };
+  const add = (a) => {
+    const href = a.href;
+    if (href && href.includes('/video/') && !h.seen.has(href)) { h.seen.add(href); h.links.push(href); }
+  };
+  const scan = (node) => {
+    if (node.matches && node.matches('a[href*="/video/"]')) add(node);
+    if (node.querySelectorAll) node.querySelectorAll('a[href*="/video/"]').forEach(add);
+  };
+  scan(document);
+  new MutationObserver((muts) => {
+    for (const m of muts) {
+      if (m.type === 'attributes') scan(m.target); else m.addedNodes.forEach(scan);
+    }
+  }).observe(document.documentElement, { childList: true, subtree: true, attributes: true, attributeFilter: ['href'] });
+  return h.links.length;
+}
+"""
+
+HARVEST_READ_JS = r"""
+(start) => {
+  const h = window.__harvest;
+  return { links: h ? h.links.slice(start) : [], height: document.body ? document.body.scrollHeight : 0 };
+}
+"""
+
+
+# name -> function source, as exposed on window.__scraper.
+PAGE_FUNCTIONS: Dict[str, str] = {
+    "exploreLinks": EXPLORE_LINKS_JS,
+    "acceptCookies": ACCEPT_COOKIES_JS,
+    "extract": EXTRACT_JS,
+    "harvestInstall": HARVEST_INSTALL_JS,
+    "harvestRead": HARVEST_READ_JS,
+    "isVerify": VERIFY_PAGE_JS,
+}
+
+
+def _api_source(functions: Dict[str, str]) -> str:
+    members = ",\n".join(f"    {name}: {source.strip()}" for name, source in functions.items())
+    return (
+        "(() => {\n"
+        "  if (window.__scraper) return;\n"
+        f"  const api = {{\n    version: {SCRAPER_API_VERSION},\n{members}\n  }};\n"
+        "  Object.defineProperty(window, '__scraper', { value: Object.freeze(api) });\n"
+        "})();\n"
+    )
+
+
+SCRAPER_API_JS = _api_source(PAGE_FUNCTIONS)
+
+_CALL_JS = (
+    "([name, arg]) => { const api = window.__scraper;"
+    f" return api && api.version === {SCRAPER_API_VERSION} ? {{ value: api[name](arg) }} : null; }}"
+)
+
+register_init_script(SCRAPER_API_JS)
+
+
+def call_page_api(page: Page, name: str, arg=None):
+    """Run ``window.__scraper[name](arg)`` on ``page``, evaluating the full source if the API is missing."""
+    out = page.evaluate(_CALL_JS, [name, arg])
+    if out is not None:
+        return out.get("value")
+    count(FALLBACKS, kind="page_api")
+    return page.evaluate(PAGE_FUNCTIONS[name], arg)
@@ -0,0 +1,397 @@
+"""Pure-Python helpers for turning TikTok item JSON into video records.
+
+These mirror the field mapping used by the in-page ``extract_video_metadata``
+script so records look the same whether they come from a rendered page, JSON
+captured off the wire or raw HTML fetched over HTTP. The explore grid HTML
+parser lives here too. Nothing here needs a browser.
+"""
+import io
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import lxml.html
+from lxml import etree
+
+
+VIDEO_ID_RE = re.compile(r"/video/(\d+)")
+
+# Site root; point TIKTOK_BASE_URL at a fixture server to replay recorded pages.
+BASE_URL = os.environ.get("TIKTOK_BASE_URL", "https://www.tiktok.com").rstrip("/")
+
+# Markers of a captcha/verify interstitial in raw HTML (see utils.readiness.VERIFY_PAGE_JS).
+VERIFY_HTML_RE = re.compile(
+    r'id="tiktok-verify-ele"|captcha-verify|captcha_verify_container|verify to continue|安全验证', re.I
+)
+
+# Fields a record must carry before we trust it without visiting the video page.
+REQUIRED_FIELDS = ("text", "authorMeta.name", "createTimeISO", "downloadUrl")
+
+
+def is_verify_html(html: str) -> bool:
+    """True when ``html`` looks like a captcha/verify page rather than content."""
+    return bool(VERIFY_HTML_RE.search(html or ""))
+
+
+def video_id_from_url(url: str) -> Optional[str]:
+    """Return the numeric video ID from a ``/video/<id>`` URL, if any."""
+    m = VIDEO_ID_RE.search(url or "")
+    return m.group(1) if m else None
+
+
+def explore_url(base_url: Optional[str] = None) -> str:
+    """Explore page URL under ``base_url`` (defaults to BASE_URL)."""
+    return f"{(base_url or BASE_URL).rstrip('/')}/explore?lang=cn"
+
+
+def search_url(keyword: str, base_url: Optional[str] = None) -> str:
+    """Video search results URL for ``keyword`` under ``base_url`` (defaults to BASE_URL)."""
+    return f"{(base_url or BASE_URL).rstrip('/')}/search/video?q={quote(keyword)}"
+
+
+def video_url(item: Dict[str, object], base_url: Optional[str] = None) -> str:
+    """Build the canonical web URL for a feed item."""
+    author = item.get("author")
+    unique_id = author.get("uniqueId", "") if isinstance(author, dict) else (author or "")
+    return f"{(base_url or BASE_URL).rstrip('/')}/@{unique_id}/video/{item.get('id', '')}"
+
+
+def iso_from_epoch(seconds) -> Optional[str]:
+    """Format epoch seconds like JS ``Date.prototype.toISOString``."""
+    try:
+        dt = datetime.fromtimestamp(float(seconds), tz=timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def _pick_url(obj) -> str:
+    if not obj:
+        return ""
+    if isinstance(obj, str):
+        return obj
+    if isinstance(obj, dict):
+        for key in ("UrlList", "url_list"):
+            urls = obj.get(key)
+            if urls:
+                return urls[0]
+        return ""
+    if isinstance(obj, list):
+        return obj[0] if obj else ""
+    return ""
+
+
+def pick_download_url(video: Dict[str, object]) -> str:
+    """Choose a download URL the same way the in-page extractor does."""
+    bitrate_info = video.get("bitrateInfo")
+    bi0 = bitrate_info[0] if isinstance(bitrate_info, list) and bitrate_info else {}
+    if not isinstance(bi0, dict):
+        bi0 = {}
+    cand = video.get("downloadAddr") or video.get("playAddr") or bi0.get("PlayAddr") or bi0.get("playAddr") or ""
+    if not isinstance(cand, str):
+        cand = _pick_url(cand)
+    if not cand:
+        cand = (
+            _pick_url(video.get("downloadAddr"))
+            or _pick_url(video.get("playAddr"))
+            or _pick_url(bi0.get("PlayAddr"))
+            or _pick_url(bi0.get("playAddr"))
+        )
+    return cand or ""
+
+
+def item_to_record(
+    item: Dict[str, object],
+    web_url: Optional[str] = None,
+    users: Optional[Dict[str, Dict[str, object]]] = None,
+) -> Dict[str, object]:
+    """Map a TikTok item struct (SIGI ItemModule entry, itemStruct or feed item) to a record."""
+    stats = item.get("stats") or {}
+    video = item.get("video") or {}
+    music = item.get("music") or {}
+    author = item.get("author")
+    users = users or {}
+
+    if isinstance(author, dict):
+        author_name = author.get("uniqueId") or author.get("nickname") or ""
+    else:
+        author_name = author or ""
+    user = users.get(author_name) or (author if isinstance(author, dict) else None) or {}
+
+    video_meta = video.get("videoMeta") if isinstance(video.get("videoMeta"), dict) else {}
+    record: Dict[str, object] = {
+        "webVideoUrl": web_url or video_url(item),
+        "text": item.get("desc") or item.get("title") or "",
+        "diggCount": stats.get("diggCount") or 0,
+        "shareCount": stats.get("shareCount") or 0,
+        "playCount": stats.get("playCount") or 0,
+        "commentCount": stats.get("commentCount") or 0,
+        "collectCount": stats.get("collectCount") or 0,
+        "videoMeta.duration": video.get("duration") or video_meta.get("duration") or None,
+        "musicMeta.musicName": music.get("title") or music.get("musicName") or "",
+        "musicMeta.musicAuthor": music.get("authorName") or music.get("musicAuthor") or "",
+        "musicMeta.musicOriginal": bool(
+            music["original"] if music.get("original") is not None else music.get("musicOriginal")
+        ),
+        "authorMeta.name": author_name,
+        "authorMeta.avatar": user.get("avatarLarger") or user.get("avatarThumb") or user.get("avatarMedium") or "",
+    }
+    if item.get("createTime"):
+        iso = iso_from_epoch(item["createTime"])
+        if iso:
+            record["createTimeISO"] = iso
+    record["downloadUrl"] = pick_download_url(video)
+    return record
+
+
+def is_complete_record(record: Dict[str, object], required: Iterable[str] = REQUIRED_FIELDS) -> bool:
+    """True when every required field is present and non-empty."""
+    return all(record.get(field) for field in required)
+
+
+def items_from_feed_payload(payload) -> Iterable[Dict[str, object]]:
+    """Yield item structs from an explore/recommend ``item_list`` or search JSON response."""
+    if not isinstance(payload, dict):
+        return []
+    items = payload.get("itemList") or payload.get("item_list") or payload.get("items") or []
+    if not items and isinstance(payload.get("data"), list):
+        # General search mixes result types: [{"type": 1, "item": {...}}, {"type": 4, "user_list": ...}]
+        items = [entry.get("item") for entry in payload["data"] if isinstance(entry, dict)]
+    return [it for it in items if isinstance(it, dict) and it.get("id")]
+
+
+# --- Raw HTML extraction (same four tiers as the in-page script) -------------
+
+TIER_SIGI = "sigi"
+TIER_NEXT_DATA = "next_data"
+TIER_LD_JSON = "ld_json"
+TIER_OG = "og"
+
+# Tiers that come from embedded page state; anything else means the HTML was
+# probably a shell/verify page and a real browser may do better.
+STATE_TIERS = (TIER_SIGI, TIER_NEXT_DATA)
+
+_SIGI_PREFIX_RE = re.compile(r"""^\s*window(?:\.SIGI_STATE|\[["']SIGI_STATE["']\])\s*=\s*""", re.I)
+
+
+def parse_state_from_script(txt: str):
+    """Parse a SIGI_STATE script body, tolerating a ``window.SIGI_STATE =`` prefix."""
+    if not txt:
+        return None
+    try:
+        return json.loads(txt)
+    except ValueError:
+        pass
+    try:
+        return json.loads(_SIGI_PREFIX_RE.sub("", txt.strip()).rstrip().rstrip(";"))
+    except ValueError:
+        return None
+
+
+def _script_text(doc, xpath: str) -> str:
+    nodes = doc.xpath(xpath)
+    return (nodes[0].text or "") if nodes else ""
+
+
+def _ld_json_record(obj: Dict[str, object], url: str) -> Dict[str, object]:
+    record: Dict[str, object] = {"webVideoUrl": url, "text": obj.get("description") or obj.get("name") or ""}
+    stats = obj.get("interactionStatistic")
+    if isinstance(stats, list):
+        for st in stats:
+            if not isinstance(st, dict):
+                continue
+            kind = st.get("interactionType") or ""
+            if isinstance(kind, dict):
+                kind = kind.get("@type") or kind.get("name") or ""
+            kind = str(kind)
+            try:
+                count = int(float(st.get("userInteractionCount") or 0))
+            except (TypeError, ValueError):
+                count = 0
+            if re.search(r"like", kind, re.I):
+                record["diggCount"] = count
+            if re.search(r"comment", kind, re.I):
+                record["commentCount"] = count
+            if re.search(r"share", kind, re.I):
+                record["shareCount"] = count
+            if re.search(r"play|view", kind, re.I):
+                record["playCount"] = count
+    record["videoMeta.duration"] = obj.get("duration") or None
+    if obj.get("uploadDate"):
+        try:
+            dt = datetime.fromisoformat(str(obj["uploadDate"]).replace("Z", "+00:00"))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            record["createTimeISO"] = iso_from_epoch(dt.timestamp())
+        except ValueError:
+            pass
+    author = obj.get("author")
+    record["authorMeta.name"] = (author.get("name") if isinstance(author, dict) else author) or ""
+    record["downloadUrl"] = obj.get("contentUrl") or obj.get("embedUrl") or ""
+    return record
+
+
+def extract_video_metadata_from_html(html: str, url: str) -> Tuple[Dict[str, object], str]:
+    """Extract a video record from raw page HTML without a browser.
+
+    Tries SIGI_STATE, then __NEXT_DATA__, then LD+JSON, then OG tags, like
+    ``scrapers.tiktok_base.extract_video_metadata``. Returns ``(record, tier)``.
+    """
+    doc = lxml.html.fromstring((html or "").strip() or "<html></html>")
+
+    def with_video_src(record: Dict[str, object]) -> Dict[str, object]:
+        if not record.get("downloadUrl"):
+            src = doc.xpath("//video/@src")
+            if src:
+                record["downloadUrl"] = src[0]
+        return record
+
+    # 1) SIGI_STATE
+    state = parse_state_from_script(
+        _script_text(doc, '//script[@id="SIGI_STATE"]') or _script_text(doc, '//script[contains(@id, "SIGI")]')
+    )
+    if isinstance(state, dict) and isinstance(state.get("ItemModule"), dict) and state["ItemModule"]:
+        item = next(iter(state["ItemModule"].values()))
+        users = (state.get("UserModule") or {}).get("users") or {}
+        return with_video_src(item_to_record(item, web_url=url, users=users)), TIER_SIGI
+
+    # 2) Next.js data
+    try:
+        next_data = json.loads(_script_text(doc, '//script[@id="__NEXT_DATA__"]') or "null")
+    except ValueError:
+        next_data = None
+    if isinstance(next_data, dict):
+        pp = (next_data.get("props") or {}).get("pageProps") or {}
+        item = ((pp.get("itemInfo") or {}).get("itemStruct")) or ((pp.get("videoData") or {}).get("itemInfos"))
+        if isinstance(item, dict):
+            return with_video_src(item_to_record(item, web_url=url)), TIER_NEXT_DATA
+
+    # 3) LD+JSON
+    for node in doc.xpath('//script[@type="application/ld+json"]'):
+        try:
+            obj = json.loads(node.text or "")
+        except ValueError:
+            continue
+        if isinstance(obj, dict) and "video" in str(obj.get("@type", "")).lower():
+            return _ld_json_record(obj, url), TIER_LD_JSON
+
+    # 4) Minimal OG fallback
+    def meta(xpath: str) -> str:
+        found = doc.xpath(xpath)
+        return found[0] if found else ""
+
+    title = meta('//meta[@property="og:title"]/@content')
+    desc = meta('//meta[@name="description"]/@content')
+    return {
+        "webVideoUrl": url,
+        "text": desc or title,
+        "downloadUrl": meta('//meta[@property="og:video"]/@content')
+        or meta('//meta[@property="og:video:secure_url"]/@content'),
+    }, TIER_OG
+
+
+# --- Explore grid HTML ---------------------------------------------------------
+
+# bs4's get_text() skips every string nested (at any depth) inside these, and
+# comments; so do we.
+_NON_TEXT_TAGS = frozenset(("script", "style", "template"))
+
+
+def _append_text(el, parts: List[str]) -> None:
+    if not isinstance(el.tag, str):
+        return  # comment / processing instruction: only its tail counts
+    if el.tag in _NON_TEXT_TAGS:
+        return
+    if el.text:
+        parts.append(el.text)
+    for child in el:
+        _append_text(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+
+
+def _stripped_text(el) -> str:
+    """Equivalent of BeautifulSoup ``get_text(strip=True)`` for an lxml element."""
+    if any(anc.tag in _NON_TEXT_TAGS for anc in el.iterancestors()):
+        return ""
+    parts: List[str] = []
+    _append_text(el, parts)
+    return "".join(p for p in (s.strip() for s in parts) if p)
+
+
+# Title sources parse_tiktok_explore() can use, in priority order.
+TITLE_SOURCES = ("video-title", "strong", "span")
+
+
+def parse_tiktok_explore(html: str, title_sources: Iterable[str] = TITLE_SOURCES) -> List[Dict[str, str]]:
+    """Parse explore HTML to extract video links and titles, de-duplicated.
+
+    Single streaming pass over lxml ``iterparse`` events: each ``<a href>``
+    containing ``/video/`` takes its title from the first descendant
+    ``div[data-e2e="video-title"]``, else ``<strong>``, else ``<span>``
+    ("No title" if none), duplicates are dropped on sight, and finished
+    subtrees are freed as we go. ``title_sources`` restricts which of
+    those are used (e.g. ``("video-title",)``); the priority stays the same.
+    """
+    sources = set(title_sources)
+    result: List[Dict[str, str]] = []
+    seen = set()
+    # Open /video/ anchors: [element, result entry or None if duplicate,
+    # first title div, first strong, first span]
+    open_anchors: List[list] = []
+    data = html.encode("utf-8") if isinstance(html, str) else html
+    if not data.strip():
+        return result
+    for event, el in etree.iterparse(io.BytesIO(data), events=("start", "end"), html=True, encoding="utf-8"):
+        tag = el.tag
+        if event == "start":
+            if tag == "a":
+                href = el.get("href")
+                if href is not None and "/video/" in href:
+                    # Reserve the slot now so output follows anchor start order.
+                    entry = None
+                    if href not in seen:
+                        seen.add(href)
+                        entry = {"url": href, "title": "No title"}
+                        result.append(entry)
+                    open_anchors.append([el, entry, None, None, None])
+            elif open_anchors:
+                slot = None
+                if tag == "div" and el.get("data-e2e") == "video-title":
+                    slot = 2 if "video-title" in sources else None
+                elif tag == "strong":
+                    slot = 3 if "strong" in sources else None
+                elif tag == "span":
+                    slot = 4 if "span" in sources else None
+                if slot is not None:
+                    for anchor in open_anchors:
+                        if anchor[slot] is None:
+                            anchor[slot] = el
+            continue
+
+        if open_anchors and open_anchors[-1][0] is el:
+            _, entry, title_div, strong, span = open_anchors.pop()
+            if entry is not None:
+                title_el = title_div if title_div is not None else strong if strong is not None else span
+                if title_el is not None:
+                    entry["title"] = _stripped_text(title_el)
+        if not open_anchors:
+            # Nothing still needs this subtree: free it and the siblings before it.
+            el.clear(keep_tail=True)
+            parent = el.getparent()
+            if parent is not None:
+                while el.getprevious() is not None:
+                    del parent[0]
+    return result
+
+
+if __name__ == "__main__":
+    # Offline check against a saved page, e.g. one written by save_debug_html().
+    import sys
+
+    with open(sys.argv[1], encoding="utf-8") as f:
+        rec, tier = extract_video_metadata_from_html(f.read(), sys.argv[2] if len(sys.argv) > 2 else "")
+    print(json.dumps({"tier": tier, "record": rec}, ensure_ascii=False, indent=2))
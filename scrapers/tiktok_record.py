@@ -0,0 +1,272 @@
+"""Compact, typed video records and their serializers.
+
+The scrapers produce dicts with dotted keys ("authorMeta.name", ...) whose
+values depend on the source tier: counts may be ints, floats or strings
+like "1.2M", durations may be ISO 8601 ("PT15S"), and the creation time is
+only an ISO string. ``VideoRecord`` keeps one record in ``__slots__`` with
+counts as ints, duration as int seconds and the creation time as epoch
+seconds plus ISO. ``to_dict()`` gives back the API's dotted-key shape with
+exactly the keys the source record had (a bitmask remembers them, so an
+explicit ``"videoMeta.duration": null`` survives), and a fallback
+``{"webVideoUrl": href}`` round-trips unchanged.
+
+JSON uses orjson when it is installed; Parquet export needs pyarrow.
+"""
+import csv
+import io
+import json
+import re
+from datetime import datetime, timezone
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from scrapers.tiktok_parse import iso_from_epoch, video_id_from_url
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+# (slot, dotted key, kind) in API field order.
+FIELDS: Tuple[Tuple[str, str, str], ...] = (
+    ("web_video_url", "webVideoUrl", "str"),
+    ("text", "text", "str"),
+    ("digg_count", "diggCount", "count"),
+    ("share_count", "shareCount", "count"),
+    ("play_count", "playCount", "count"),
+    ("comment_count", "commentCount", "count"),
+    ("collect_count", "collectCount", "count"),
+    ("duration", "videoMeta.duration", "duration"),
+    ("music_name", "musicMeta.musicName", "str"),
+    ("music_author", "musicMeta.musicAuthor", "str"),
+    ("music_original", "musicMeta.musicOriginal", "bool"),
+    ("author_name", "authorMeta.name", "str"),
+    ("author_avatar", "authorMeta.avatar", "str"),
+    ("create_time_iso", "createTimeISO", "str"),
+    ("download_url", "downloadUrl", "str"),
+)
+
+# CSV/Parquet columns: the API keys plus the epoch creation time.
+COLUMNS: Tuple[str, ...] = tuple(key for _slot, key, _kind in FIELDS) + ("createTime",)
+
+_KEY_TO_SLOT = {key: slot for slot, key, _kind in FIELDS}
+_KEY_BIT = {key: 1 << i for i, (_slot, key, _kind) in enumerate(FIELDS)}
+_SLOT_BIT = {slot: 1 << i for i, (slot, _key, _kind) in enumerate(FIELDS)}
+_SUFFIX = {"K": 1_000, "W": 10_000, "M": 1_000_000, "B": 1_000_000_000}
+_COUNT_RE = re.compile(r"^\s*([\d.,]+)\s*([KkWwMmBb]?)\s*$")
+_ISO_DURATION_RE = re.compile(r"^P(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)$", re.I)
+
+
+def to_count(value) -> int:
+    """Normalize 1234 / 1234.0 / "1,234" / "1.2M" / "3.4万"-style "3.4W" to an int (0 if unparseable)."""
+    if isinstance(value, bool) or value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    m = _COUNT_RE.match(str(value))
+    if not m:
+        return 0
+    try:
+        number = float(m.group(1).replace(",", ""))
+    except ValueError:
+        return 0
+    return int(number * _SUFFIX.get(m.group(2).upper(), 1))
+
+
+def to_duration(value) -> Optional[int]:
+    """Seconds from 15 / "15" / "PT15S" / "PT1M5S"; None when unknown."""
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    if text.replace(".", "", 1).isdigit():
+        return int(float(text))
+    m = _ISO_DURATION_RE.match(text)
+    if not m or not any(m.groups()):
+        return None
+    hours, minutes, seconds = (float(g) if g else 0.0 for g in m.groups())
+    return int(hours * 3600 + minutes * 60 + seconds)
+
+
+def epoch_from_iso(value: str) -> Optional[int]:
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+class VideoRecord:
+    """One video, typed and slot-backed. Unset fields are None and omitted from to_dict()."""
+
+    __slots__ = tuple(slot for slot, _key, _kind in FIELDS) + ("create_time", "extra", "present")
+
+    def __init__(self, **fields):
+        for slot in self.__slots__:
+            setattr(self, slot, None)
+        self.present = 0
+        for name, value in fields.items():
+            setattr(self, name, value)
+            self.present |= _SLOT_BIT.get(name, 0)
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, object]) -> "VideoRecord":
+        """Build from a scraper dict (dotted keys); unknown keys are kept in ``extra``.
+
+        Raises TypeError when a text field holds a dict or list (a mapping bug upstream).
+        """
+        self = cls.__new__(cls)
+        for slot in cls.__slots__:
+            setattr(self, slot, None)
+        extra = None
+        present = 0
+        for key, value in record.items():
+            slot = _KEY_TO_SLOT.get(key)
+            if slot is None:
+                if key == "createTime":
+                    self.create_time = int(value) if value else None
+                else:
+                    extra = extra or {}
+                    extra[key] = value
+                continue
+            setattr(self, slot, value)
+            present |= _KEY_BIT[key]
+        for slot, _key, kind in FIELDS:
+            value = getattr(self, slot)
+            if value is None:
+                continue
+            if kind == "count":
+                setattr(self, slot, to_count(value))
+            elif kind == "duration":
+                setattr(self, slot, to_duration(value))
+            elif kind == "bool":
+                setattr(self, slot, bool(value))
+            elif isinstance(value, (dict, list)):
+                raise TypeError(f"{_key}: expected a scalar, got {type(value).__name__}")
+            elif not isinstance(value, str):
+                setattr(self, slot, str(value))
+        if self.create_time is None and self.create_time_iso:
+            self.create_time = epoch_from_iso(self.create_time_iso)
+        elif self.create_time is not None and not self.create_time_iso:
+            self.create_time_iso = iso_from_epoch(self.create_time)
+        self.extra = extra
+        self.present = present
+        return self
+
+    @property
+    def video_id(self) -> Optional[str]:
+        return video_id_from_url(self.web_video_url or "")
+
+    def to_dict(self) -> Dict[str, object]:
+        """The API's dotted-key dict, in the usual field order: fields that are set or were in the source."""
+        out: Dict[str, object] = {}
+        for slot, key, _kind in FIELDS:
+            value = getattr(self, slot)
+            if value is not None or self.present & _KEY_BIT[key]:
+                out[key] = value
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+    def to_row(self) -> Tuple[object, ...]:
+        """Values for COLUMNS (None for unset fields)."""
+        return tuple(getattr(self, slot) for slot, _key, _kind in FIELDS) + (self.create_time,)
+
+    def to_json(self) -> str:
+        return dumps(self.to_dict())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, VideoRecord) and self.to_dict() == other.to_dict() and self.to_row() == other.to_row()
+
+    def __repr__(self) -> str:
+        return f"VideoRecord({self.web_video_url!r})"
+
+
+RecordLike = Union[VideoRecord, Dict[str, object]]
+
+
+def as_record(record: RecordLike) -> VideoRecord:
+    return record if isinstance(record, VideoRecord) else VideoRecord.from_dict(record)
+
+
+def to_records(records: Iterable[RecordLike]) -> List[VideoRecord]:
+    """Compact a batch of scraper dicts for keeping in memory."""
+    return [as_record(r) for r in records]
+
+
+def dumps(obj) -> str:
+    """Compact JSON (non-ASCII kept as-is), via orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def record_json(record: RecordLike) -> str:
+    """One normalized record as compact JSON."""
+    return as_record(record).to_json()
+
+
+def records_json(records: Iterable[RecordLike]) -> str:
+    """A JSON array of normalized records."""
+    return dumps([as_record(r).to_dict() for r in records])
+
+
+def iter_ndjson(records: Iterable[RecordLike]) -> Iterator[str]:
+    for record in records:
+        yield record_json(record) + "\n"
+
+
+def write_csv(records: Iterable[RecordLike], out: Union[str, IO[str]]) -> int:
+    """Write records as CSV with COLUMNS as the header; returns the row count."""
+    f = open(out, "w", encoding="utf-8", newline="") if isinstance(out, str) else out
+    try:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        n = 0
+        for record in records:
+            writer.writerow(["" if v is None else v for v in as_record(record).to_row()])
+            n += 1
+        return n
+    finally:
+        if isinstance(out, str):
+            f.close()
+
+
+def csv_text(records: Iterable[RecordLike]) -> str:
+    buf = io.StringIO()
+    write_csv(records, buf)
+    return buf.getvalue()
+
+
+def write_parquet(records: Iterable[RecordLike], path: str, batch_size: int = 10_000) -> int:
+    """Write records to a Parquet file in row batches; requires pyarrow."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)") from None
+
+    types = {"str": pa.string(), "count": pa.int64(), "duration": pa.int64(), "bool": pa.bool_()}
+    schema = pa.schema([(key, types[kind]) for _slot, key, kind in FIELDS] + [("createTime", pa.int64())])
+    n = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch: List[Tuple[object, ...]] = []
+
+        def flush() -> None:
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+            ))
+            batch.clear()
+
+        for record in records:
+            batch.append(as_record(record).to_row())
+            n += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    return n
@@ -0,0 +1,140 @@
+"""Keyword search over TikTok's video search results.
+
+Each keyword's result grid is opened on a warm page of its own (keywords
+run concurrently on the "search" browser executor) and scrolled only until
+``number`` unique videos are found. The per-keyword lists are merged
+round-robin by rank and de-duplicated by video ID, then resolved to full
+records by the same pipeline as the explore scraper (cache, captured search
+API responses, HTTP fast path, warm-page extraction).
+"""
+import re
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from scrapers.tiktok_base import FeedCapture, iter_explore_links, open_video_grid, resolve_links
+from scrapers.tiktok_parse import search_url, video_id_from_url
+from utils.browser import create_page, map_in_browser_threads
+from utils.cache import get_cache
+from utils.metrics import FALLBACKS, count
+
+
+_KEYWORD_SPLIT_RE = re.compile(r"[,，;；\n]+")
+
+
+def parse_keywords(keywords: Union[str, Iterable[str]]) -> List[str]:
+    """Split ``"a, b，c"`` (or take a list) into unique, non-empty keywords, keeping order."""
+    parts = _KEYWORD_SPLIT_RE.split(keywords) if isinstance(keywords, str) else list(keywords)
+    out: List[str] = []
+    for part in parts:
+        kw = str(part).strip()
+        if kw and kw not in out:
+            out.append(kw)
+    return out
+
+
+def search_links(
+    keyword: str,
+    number: int = 10,
+    headless: bool = True,
+    capture: bool = True,
+    base_url: Optional[str] = None,
+) -> Tuple[List[str], Dict[str, Dict[str, object]]]:
+    """Return up to ``number`` unique video links for ``keyword`` plus any captured search records."""
+    with create_page(headless=headless, profile="explore") as page:
+        feed = FeedCapture(page, base_url) if capture else None
+        try:
+            open_video_grid(page, search_url(keyword, base_url), kind="search")
+            links = list(iter_explore_links(page, number, before_read=feed.drain if feed is not None else None))
+            captured = dict(feed.drain()) if feed is not None else {}
+        finally:
+            if feed is not None:
+                feed.close()
+    return links, captured
+
+
+def _search_links_safe(keyword: str, **kwargs) -> Tuple[List[str], Dict[str, Dict[str, object]]]:
+    """search_links() that treats a failed keyword (e.g. a goto timeout) as having no results."""
+    try:
+        return search_links(keyword, **kwargs)
+    except Exception:
+        count(FALLBACKS, kind="search_keyword")
+        return [], {}
+
+
+def merge_links(per_keyword: Iterable[List[str]]) -> List[str]:
+    """Interleave ranked link lists (1st of each, then 2nd of each, ...) without duplicate videos."""
+    lists = list(per_keyword)
+    seen = set()
+    merged: List[str] = []
+    for rank in range(max((len(links) for links in lists), default=0)):
+        for links in lists:
+            if rank < len(links):
+                href = links[rank]
+                vid = video_id_from_url(href) or href
+                if vid not in seen:
+                    seen.add(vid)
+                    merged.append(href)
+    return merged
+
+
+def iter_search_items(
+    keywords: Union[str, Iterable[str]],
+    number: int = 10,
+    headless: bool = True,
+    concurrency: int = 2,
+    capture: bool = True,
+    http_first: bool = False,
+    use_cache: bool = True,
+    base_url: Optional[str] = None,
+) -> Iterator[Dict[str, object]]:
+    """Generator version of search_videos_by_keywords(); arguments are the same."""
+    kws = parse_keywords(keywords)
+    if not kws:
+        return
+    harvest = partial(_search_links_safe, number=number, headless=headless, capture=capture, base_url=base_url)
+    # Keywords get their own executor: the extraction below fans out on "extract".
+    per_keyword = map_in_browser_threads(harvest, kws, concurrency=len(kws), name="search")
+    captured: Dict[str, Dict[str, object]] = {}
+    for _links, records in per_keyword:
+        captured.update(records)
+    links = merge_links(links for links, _records in per_keyword)
+    cache = get_cache() if use_cache else None
+    records = resolve_links(links, captured, headless, concurrency, http_first, cache)
+    try:
+        yield from records
+    finally:
+        records.close()
+
+
+def search_videos_by_keywords(
+    keywords: Union[str, Iterable[str]],
+    number: int = 10,
+    headless: bool = True,
+    concurrency: int = 2,
+    capture: bool = True,
+    http_first: bool = False,
+    use_cache: bool = True,
+    base_url: Optional[str] = None,
+) -> List[Dict[str, object]]:
+    """Search videos for one or more keywords and return rich records.
+
+    - keywords: a list, or one string separated by commas/semicolons/newlines
+    - number: unique videos to collect per keyword; results are merged by
+      rank across keywords and de-duplicated, so at most
+      ``number * len(keywords)`` records come back. A keyword whose search
+      page fails contributes no videos instead of failing the request.
+    - concurrency: warm pages used to extract the merged videos
+    - capture, http_first, use_cache, base_url: as for collect_explore_items()
+    """
+    return list(
+        iter_search_items(
+            keywords,
+            number=number,
+            headless=headless,
+            concurrency=concurrency,
+            capture=capture,
+            http_first=http_first,
+            use_cache=use_cache,
+            base_url=base_url,
+        )
+    )
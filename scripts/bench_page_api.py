@@ -0,0 +1,79 @@
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from scrapers.tiktok_js import _CALL_JS, PAGE_FUNCTIONS, call_page_api
+from scripts.fixture_server import FixtureConfig, make_item, start_fixture_server
+from utils.browser import create_page
+from utils.readiness import wait_until_ready
+
+# Helpers timed on each kind of fixture page, with the argument they are called with.
+CALLS = {
+    "video": (("extract", None), ("isVerify", 20000), ("acceptCookies", None)),
+    "explore": (("exploreLinks", None), ("harvestRead", 0)),
+}
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> List[float]:
+    out = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - started) * 1000)
+    return out
+
+
+def bench_calls(page, kind: str, repeat: int) -> List[Dict[str, object]]:
+    """Per-call latency and script bytes sent: full source per evaluate vs window.__scraper."""
+    rows = []
+    for name, arg in CALLS[kind]:
+        source = PAGE_FUNCTIONS[name]
+        inline = _timed(lambda: page.evaluate(source, arg), repeat)
+        api = _timed(lambda: call_page_api(page, name, arg), repeat)
+        result_bytes = len(json.dumps(call_page_api(page, name, arg), ensure_ascii=False).encode("utf-8"))
+        rows.append({
+            "page": kind,
+            "helper": name,
+            "inlineMs": round(statistics.median(inline), 3),
+            "apiMs": round(statistics.median(api), 3),
+            "inlineScriptBytes": len(source.encode("utf-8")),
+            "apiScriptBytes": len(_CALL_JS.encode("utf-8")) + len(json.dumps([name, arg])),
+            "resultBytes": result_bytes,
+        })
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-evaluate cost of shipping helper JS per call vs the init-script API")
+    ap.add_argument("--repeat", type=int, default=200, help="Calls timed per helper and mode")
+    ap.add_argument("--base-url", default=None, help="Use a running fixture server instead of starting one")
+    ap.add_argument("--headful", action="store_true")
+    args = ap.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_fixture_server(FixtureConfig())
+    try:
+        item = make_item(0)
+        urls = {
+            "video": f"{base_url}/@{item['author']['uniqueId']}/video/{item['id']}",
+            "explore": f"{base_url}/explore",
+        }
+        with create_page(headless=not args.headful, profile="video") as page:
+            for kind, url in urls.items():
+                page.goto(url, wait_until="load", timeout=60_000)
+                wait_until_ready(page, kind, timeout_ms=9000)
+                if kind == "explore":
+                    call_page_api(page, "harvestInstall")
+                for row in bench_calls(page, kind, args.repeat):
+                    print(json.dumps(row))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
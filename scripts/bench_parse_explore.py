@@ -0,0 +1,110 @@
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from scrapers.tiktok_parse import parse_tiktok_explore
+
+
+def parse_tiktok_explore_bs4(html: str):
+    """Previous BeautifulSoup implementation, kept as the reference for comparison."""
+    soup = BeautifulSoup(html, "lxml")
+    result = []
+    for a in soup.find_all("a", href=True):
+        href = a["href"]
+        if "/video/" in href:
+            title_tag = (
+                a.find("div", attrs={"data-e2e": "video-title"})
+                or a.find("strong")
+                or a.find("span")
+            )
+            title = title_tag.get_text(strip=True) if title_tag else "No title"
+            result.append({"url": href, "title": title})
+
+    seen = set()
+    clean_result = []
+    for item in result:
+        if item["url"] not in seen:
+            seen.add(item["url"])
+            clean_result.append(item)
+    return clean_result
+
+
+def _card(rng: random.Random, vid: int) -> str:
+    href = f"https://www.tiktok.com/@user{vid % 97}/video/{7300000000000000000 + vid}"
+    title = f"视频 {vid} #fyp <b>hot</b> &amp; trending"
+    style = rng.randrange(5)
+    if style == 0:
+        inner = f'<div data-e2e="video-title"> {title} </div><span>{vid} likes</span>'
+    elif style == 1:
+        inner = f"<picture><img src='x{vid}.jpg'></picture><strong>{title}</strong><span>meta</span>"
+    elif style == 2:
+        inner = f"<div class='c'><span> {title} <!-- ad --> </span></div>"
+    elif style == 3:
+        inner = f"<div class='thumb'><img src='y{vid}.jpg'></div>"
+    else:
+        inner = f"<span></span><div data-e2e='video-title'><p>{title}</p><script>var x={vid};</script></div>"
+    return (
+        f'<div class="DivItemContainer" data-e2e="explore-item">'
+        f'<a href="{href}" class="AVideoLink">{inner}</a>'
+        f'<div class="DivMeta"><a href="/@user{vid % 97}">@user{vid % 97}</a>'
+        f'<span class="count">{rng.randrange(10**6)}</span></div></div>'
+    )
+
+
+def make_explore_html(cards: int, dup_ratio: float = 0.2, seed: int = 42) -> str:
+    """Synthetic explore page: ``cards`` video tiles, some repeated, plus noise markup."""
+    rng = random.Random(seed)
+    parts = ["<!DOCTYPE html><html><head><title>Explore</title>"]
+    parts.append("<script>" + "window.__noise=" + json.dumps(list(range(2000))) + ";</script>")
+    parts.append("<style>.x{color:red}</style></head><body><div id='app'><main>")
+    for i in range(cards):
+        vid = rng.randrange(i) if i and rng.random() < dup_ratio else i
+        parts.append(_card(rng, vid))
+        if i % 50 == 0:
+            parts.append("<nav>" + "".join(f"<a href='/tag/{j}'>#{j}</a>" for j in range(20)) + "</nav>")
+    parts.append("</main></div></body></html>")
+    return "".join(parts)
+
+
+def _measure(fn, html: str, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn(html)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, best, peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark parse_tiktok_explore against the old BeautifulSoup version")
+    ap.add_argument("--cards", type=int, nargs="+", default=[500, 5000, 20000], help="Video tiles per page")
+    ap.add_argument("--repeat", type=int, default=3, help="Timing runs per size (best is reported)")
+    args = ap.parse_args()
+
+    for cards in args.cards:
+        html = make_explore_html(cards)
+        old, old_s, old_peak = _measure(parse_tiktok_explore_bs4, html, args.repeat)
+        new, new_s, new_peak = _measure(parse_tiktok_explore, html, args.repeat)
+        print(json.dumps({
+            "cards": cards,
+            "htmlMB": round(len(html.encode("utf-8")) / 1e6, 2),
+            "items": len(new),
+            "identical": old == new,
+            "bs4Ms": round(old_s * 1000, 1),
+            "lxmlMs": round(new_s * 1000, 1),
+            "speedup": round(old_s / new_s, 2) if new_s else None,
+            "bs4PeakMB": round(old_peak / 1e6, 1),
+            "lxmlPeakMB": round(new_peak / 1e6, 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
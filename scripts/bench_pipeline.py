@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from scripts.fixture_server import FixtureConfig, start_fixture_server
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _tree_rss_kb(root_pid: int) -> int:
+    """Sum VmRSS of ``root_pid`` and all its descendants (Linux /proc)."""
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/status") as f:
+                fields = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            continue
+        pid = int(name)
+        children.setdefault(int(fields.get("PPid", "0").strip()), []).append(pid)
+        rss[pid] = int(fields.get("VmRSS", "0 kB").split()[0])
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+class PeakRss:
+    """Samples the RSS of this process plus its browsers while running."""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.peak_kb = max(self.peak_kb, _tree_rss_kb(os.getpid()))
+            except OSError:
+                pass
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        # Fallback where /proc is unavailable: ru_maxrss is KB on Linux.
+        self.peak_kb = max(self.peak_kb, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _summary(name: str, started: float, arrivals: List[float], latencies: List[float]) -> Dict[str, object]:
+    """Throughput from ``arrivals``; p50/p95/mean over per-item ``latencies``."""
+    elapsed = (arrivals[-1] if arrivals else time.perf_counter()) - started
+    gaps = [(b - a) * 1000 for a, b in zip([started] + arrivals, arrivals)]
+    return {
+        "stage": name,
+        "items": len(arrivals),
+        "seconds": round(elapsed, 3),
+        "itemsPerSec": round(len(arrivals) / elapsed, 2) if elapsed > 0 else None,
+        "firstItemMs": round((arrivals[0] - started) * 1000, 1) if arrivals else None,
+        "p50Ms": round(_percentile(latencies, 50) or 0, 1),
+        "p95Ms": round(_percentile(latencies, 95) or 0, 1),
+        "meanMs": round(statistics.fmean(latencies), 1) if latencies else None,
+        # Time between consecutive records: inverse throughput, not latency, once items overlap.
+        "gapP50Ms": round(_percentile(gaps, 50) or 0, 1),
+        "gapP95Ms": round(_percentile(gaps, 95) or 0, 1),
+    }
+
+
+@contextmanager
+def _item_latencies(latencies: List[float]):
+    """Record, per video, the time from its submission to the extraction threads to its result.
+
+    Wraps the imap_in_browser_threads() that the concurrent pipeline hands links to.
+    """
+    import scrapers.tiktok_base as base
+
+    original = base.imap_in_browser_threads
+
+    def timed(fn, items, concurrency, name="extract"):
+        submitted = deque()
+
+        def tagged():
+            for item in items:
+                submitted.append(time.perf_counter())
+                yield item
+
+        for result in original(fn, tagged(), concurrency, name=name):
+            latencies.append((time.perf_counter() - submitted.popleft()) * 1000)
+            yield result
+
+    base.imap_in_browser_threads = timed
+    try:
+        yield
+    finally:
+        base.imap_in_browser_threads = original
+
+
+def bench_pipeline(base_url: str, number: int, concurrency: int, mode: str, headless: bool) -> Dict[str, object]:
+    """Time iter_explore_items() end to end and each video from submission to result.
+
+    With concurrency 1 videos are processed one at a time after harvesting,
+    so the gaps after the first record are the videos' latencies.
+    """
+    from scrapers.tiktok_base import iter_explore_items
+
+    started = time.perf_counter()
+    arrivals: List[float] = []
+    latencies: List[float] = []
+    with _item_latencies(latencies):
+        records = iter_explore_items(
+            number=number,
+            headless=headless,
+            concurrency=concurrency,
+            capture=mode == "capture",
+            http_first=mode == "http",
+            use_cache=False,
+            base_url=base_url,
+        )
+        for _ in records:
+            arrivals.append(time.perf_counter())
+    if not latencies:
+        latencies = [(b - a) * 1000 for a, b in zip(arrivals, arrivals[1:])]
+    return _summary(f"collect_explore_items[{mode}]", started, arrivals, latencies)
+
+
+def bench_links(base_url: str, headless: bool) -> Dict[str, object]:
+    from scrapers.tiktok_base import fetch_explore_links
+
+    started = time.perf_counter()
+    links = fetch_explore_links(headless=headless, base_url=base_url)
+    done = time.perf_counter()
+    out = _summary("fetch_explore_links", started, [done], [(done - started) * 1000])
+    out["links"] = len(links)
+    return out
+
+
+def bench_extract(base_url: str, number: int, headless: bool) -> Dict[str, object]:
+    """Time navigate + readiness + extract_video_metadata per video on one warm page."""
+    from scrapers.tiktok_base import extract_video_metadata, wait_for_initial_data
+    from scripts.fixture_server import make_item
+    from utils.browser import create_page
+
+    urls = [f"{base_url}/@{it['author']['uniqueId']}/video/{it['id']}" for it in map(make_item, range(number))]
+    latencies: List[float] = []
+    arrivals: List[float] = []
+    started = time.perf_counter()
+    with create_page(headless=headless, profile="video") as page:
+        for url in urls:
+            t0 = time.perf_counter()
+            page.goto(url, wait_until="load", timeout=60_000)
+            wait_for_initial_data(page, timeout_ms=9000)
+            extract_video_metadata(page)
+            arrivals.append(time.perf_counter())
+            latencies.append((arrivals[-1] - t0) * 1000)
+    return _summary("extract_video_metadata", started, arrivals, latencies)
+
+
+def run_one(args) -> None:
+    """Child-process entry: one extract-threads x concurrency setting, JSON lines on stdout."""
+    from utils.browser import configure_pool
+
+    # The pipeline runs on this thread and fans extraction out to the "extract"
+    # executor, whose warm-browser threads are capped by max_concurrency.
+    configure_pool(max_concurrency=args.extract_threads)
+    headless = not args.headful
+    with PeakRss() as rss:
+        results = []
+        if "links" in args.stages:
+            results.append(bench_links(args.base_url, headless))
+        if "extract" in args.stages:
+            results.append(bench_extract(args.base_url, args.number, headless))
+        if "pipeline" in args.stages:
+            for mode in args.modes:
+                results.append(bench_pipeline(args.base_url, args.number, args.concurrency, mode, headless))
+    for r in results:
+        r.update(extractThreads=args.extract_threads, concurrency=args.concurrency, peakRssMB=round(rss.peak_kb / 1024, 1))
+        print(json.dumps(r), flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline throughput/latency benchmark against the fixture server")
+    ap.add_argument("--number", type=int, default=24, help="Videos per run")
+    ap.add_argument("--extract-threads", type=int, nargs="+", default=[1, 2, 4],
+                    help="Warm-browser extraction threads (max_concurrency)")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--modes", nargs="+", default=["browser", "http", "capture"],
+                    choices=["browser", "http", "capture"], help="Pipeline extraction modes")
+    ap.add_argument("--stages", nargs="+", default=["links", "extract", "pipeline"],
+                    choices=["links", "extract", "pipeline"])
+    ap.add_argument("--latency-ms", type=float, default=50.0, help="Artificial server latency")
+    ap.add_argument("--jitter-ms", type=float, default=10.0)
+    ap.add_argument("--fixtures", default=None, help="Directory of recorded pages to replay")
+    ap.add_argument("--headful", action="store_true")
+    ap.add_argument("--base-url", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        args.extract_threads = args.extract_threads[0]
+        args.concurrency = args.concurrency[0]
+        return run_one(args)
+
+    config = FixtureConfig(total=max(200, args.number * 2), latency_ms=args.latency_ms,
+                           jitter_ms=args.jitter_ms, fixtures_dir=args.fixtures)
+    server, base_url = start_fixture_server(config)
+    try:
+        # One child per setting so warm pools and peak RSS do not leak between runs.
+        for threads in args.extract_threads:
+            for concurrency in args.concurrency:
+                if concurrency > threads:
+                    continue
+                cmd = [
+                    sys.executable, "-m", "scripts.bench_pipeline", "--child", "--base-url", base_url,
+                    "--extract-threads", str(threads), "--concurrency", str(concurrency),
+                    "--number", str(args.number), "--modes", *args.modes, "--stages", *args.stages,
+                ] + (["--headful"] if args.headful else [])
+                subprocess.run(cmd, check=False)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
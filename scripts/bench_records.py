@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from scrapers.tiktok_parse import item_to_record
+from scrapers.tiktok_record import csv_text, record_json, records_json, to_records, write_parquet
+from scripts.fixture_server import make_item
+
+
+def make_records(n: int):
+    """Scraper-shaped dicts, with the string counts the LD+JSON/OG tiers can produce mixed in."""
+    out = []
+    for i in range(n):
+        rec = item_to_record(make_item(i))
+        if i % 3 == 0:
+            rec["playCount"] = f"{rec['playCount'] / 1e6:.1f}M"
+            rec["videoMeta.duration"] = f"PT{rec['videoMeta.duration']}S"
+        out.append(rec)
+    return out
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _peak(build) -> int:
+    tracemalloc.start()
+    kept = build()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Memory and serialization cost of dict records vs VideoRecord")
+    ap.add_argument("--records", type=int, nargs="+", default=[1000, 20000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    for n in args.records:
+        dicts = make_records(n)
+        records = to_records(dicts)
+        assert [r.to_dict() for r in to_records(records)] == [r.to_dict() for r in records]
+        row = {
+            "records": n,
+            "dictBytesPerRecord": round(_peak(lambda: [dict(d) for d in dicts]) / n),
+            "recordBytesPerRecord": round(_peak(lambda: to_records(dicts)) / n),
+            "ndjsonDictMs": round(_best(lambda: [json.dumps(d, ensure_ascii=False) for d in dicts], args.repeat) * 1000, 1),
+            "ndjsonRecordMs": round(_best(lambda: [record_json(r) for r in records], args.repeat) * 1000, 1),
+            "batchDictMs": round(_best(lambda: json.dumps(dicts, ensure_ascii=False), args.repeat) * 1000, 1),
+            "batchRecordMs": round(_best(lambda: records_json(records), args.repeat) * 1000, 1),
+            "csvMs": round(_best(lambda: csv_text(records), args.repeat) * 1000, 1),
+        }
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "records.parquet")
+                row["parquetMs"] = round(_best(lambda: write_parquet(records, path), args.repeat) * 1000, 1)
+                row["parquetBytes"] = os.path.getsize(path)
+        except RuntimeError:
+            row["parquetMs"] = None  # pyarrow not installed
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,24 @@
 import argparse
 import json
 import os
-from utils.browser import create_page
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils.browser import create_page, imap_in_browser_threads
 from scrapers.tiktok_base import maybe_accept_cookies, wait_for_initial_data
+from utils.readiness import detect_verify_page, wait_until_ready
 
 
 def diagnose(url: str, headless: bool = False, save: bool = False) -> dict:
-    with create_page(headless=headless) as page:
+    started = time.perf_counter()
+    with create_page(headless=headless, profile="diagnose") as page:
         page.goto(url, wait_until="load", timeout=60_000)
+        goto_ms = (time.perf_counter() - started) * 1000
         maybe_accept_cookies(page)
-        wait_for_initial_data(page, timeout_ms=10_000)
-        page.wait_for_timeout(1500)
+        data_wait = wait_for_initial_data(page, timeout_ms=10_000)
+        # Diagnose reports <video> presence, so give the player a moment to mount
+        player_wait = wait_until_ready(page, "player", timeout_ms=1500)
 
         diag = page.evaluate(
             """
@@ -23,7 +31,6 @@ def diagnose(url: str, headless: bool = False, save: bool = False) -> dict:
               let nextLen = 0;
               try { nextLen = (nextEl && nextEl.textContent && nextEl.textContent.length) || 0; } catch(e) {}
               const ld = document.querySelectorAll('script[type="application/ld+json"]')?.length || 0;
-              const hasVerify = !!(document.querySelector('#tiktok-verify-ele, [data-e2e*="captcha"], [id*="captcha"], #captcha-verify-image') || Array.from(document.querySelectorAll('*')).some(el => /verify you|access denied/i.test(el.textContent || '')));
               const cookieBanner = !!document.querySelector('[data-e2e="cookie-banner-accept-button"]');
               const hasVideo = !!document.querySelector('video');
               const sigiWindow = !!(window.SIGI_STATE && window.SIGI_STATE.ItemModule);
@@ -38,7 +45,6 @@ def diagnose(url: str, headless: bool = False, save: bool = False) -> dict:
                 hasNextData: !!nextEl,
                 nextScriptLength: nextLen,
                 ldJsonCount: ld,
-                hasVerifyPage: hasVerify,
                 hasCookieBanner: cookieBanner,
                 hasVideoTag: hasVideo,
                 sigiItemKeys: keys,
@@ -47,24 +53,118 @@ def diagnose(url: str, headless: bool = False, save: bool = False) -> dict:
             """
         )
 
+        # One linear pass over the text nodes (0 = no character budget)
+        diag["hasVerifyPage"] = detect_verify_page(page, max_chars=0)
+        diag["readyMs"] = {"data": round(data_wait.elapsed_ms), "player": round(player_wait.elapsed_ms)}
+        diag["gotoMs"] = round(goto_ms)
+
         if save:
             html_path = os.path.abspath("video_debug.html")
             with open(html_path, "w", encoding="utf-8") as f:
                 f.write(page.content())
             diag["savedHtml"] = html_path
 
+        diag["ms"] = round((time.perf_counter() - started) * 1000)
         return diag
 
 
+def read_urls(path: str) -> List[str]:
+    """URLs from a file (or "-" for stdin), one per line; blank lines and # comments are skipped."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        lines = [line.strip() for line in f]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def _diagnose_safe(url: str, headless: bool) -> dict:
+    try:
+        return diagnose(url, headless=headless)
+    except Exception as e:
+        return {"url": url, "error": f"{type(e).__name__}: {e}"}
+
+
+def diagnose_many(urls: Iterable[str], headless: bool = True, concurrency: int = 4) -> Iterator[dict]:
+    """Diagnose ``urls`` on warm browser threads, yielding results in input order."""
+    return imap_in_browser_threads(
+        lambda url: _diagnose_safe(url, headless), urls, concurrency, name="diagnose"
+    )
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return round(ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo), 1)
+
+
+# Data sources whose availability the summary reports, as predicates over a diagnosis.
+TIER_CHECKS = {
+    "sigiWindow": lambda d: d.get("hasWindowSIGI"),
+    "sigiScript": lambda d: d.get("hasSIGIScript"),
+    "nextData": lambda d: d.get("hasNextData"),
+    "ldJson": lambda d: d.get("ldJsonCount", 0) > 0,
+    "og": lambda d: bool(d.get("ogTitle")),
+    "videoTag": lambda d: d.get("hasVideoTag"),
+}
+
+
+def summarize(results: List[dict]) -> Dict[str, object]:
+    """Aggregate diagnoses: tier availability and verify-page rates, timing percentiles."""
+    ok = [r for r in results if "error" not in r]
+    n = len(ok)
+
+    def rate(pred) -> Optional[float]:
+        return round(sum(1 for r in ok if pred(r)) / n, 4) if n else None
+
+    def timing(values: List[float]) -> Dict[str, Optional[float]]:
+        return {"p50": _percentile(values, 50), "p95": _percentile(values, 95), "max": max(values, default=None)}
+
+    return {
+        "urls": len(results),
+        "errors": len(results) - n,
+        "tierRates": {name: rate(pred) for name, pred in TIER_CHECKS.items()},
+        "verifyPageRate": rate(lambda r: r.get("hasVerifyPage")),
+        "cookieBannerRate": rate(lambda r: r.get("hasCookieBanner")),
+        "timingsMs": {
+            "total": timing([r["ms"] for r in ok]),
+            "goto": timing([r["gotoMs"] for r in ok]),
+            "dataReady": timing([r["readyMs"]["data"] for r in ok]),
+        },
+    }
+
+
 def main():
     ap = argparse.ArgumentParser(description="Diagnose TikTok video page data availability")
-    ap.add_argument("--url", required=True, help="TikTok video URL")
-    ap.add_argument("--headless", type=int, default=0, help="1=headless, 0=headful")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--url", help="TikTok video URL")
+    src.add_argument("--urls", help="Batch mode: file with one URL per line, - for stdin")
+    ap.add_argument("--headless", type=int, default=None, help="1=headless, 0=headful (default: 0, batch: 1)")
     ap.add_argument("--save", action="store_true", help="Save page HTML to video_debug.html")
+    ap.add_argument("--concurrency", type=int, default=4, help="Batch mode: pages diagnosed at once")
+    ap.add_argument("--summary", default=None, help="Batch mode: write the summary JSON here (default: stderr)")
     args = ap.parse_args()
 
-    out = diagnose(args.url, headless=bool(args.headless), save=args.save)
-    print(json.dumps(out, ensure_ascii=False, indent=2))
+    if args.url:
+        out = diagnose(args.url, headless=bool(args.headless), save=args.save)
+        print(json.dumps(out, ensure_ascii=False, indent=2))
+        return
+
+    headless = True if args.headless is None else bool(args.headless)
+    results = []
+    for result in diagnose_many(read_urls(args.urls), headless=headless, concurrency=args.concurrency):
+        results.append(result)
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+    summary = json.dumps(summarize(results), ensure_ascii=False, indent=2)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            f.write(summary + "\n")
+    else:
+        print(summary, file=sys.stderr)
 
 
 if __name__ == "__main__":
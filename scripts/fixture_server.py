@@ -0,0 +1,310 @@
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, quote, urlsplit
+
+
+# Synthetic explore/search page: the first page of cards is server-rendered,
+# the rest is fetched from the item-list/search API on scroll, like the real site.
+EXPLORE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Explore | TikTok</title></head>
+<body><main id="grid">{cards}</main>
+<script>
+let cursor = {next_cursor}, loading = false, hasMore = {has_more};
+function card(it) {{
+  const a = document.createElement('a');
+  a.href = '/@' + it.author.uniqueId + '/video/' + it.id;
+  a.innerHTML = '<div data-e2e="video-title"></div>';
+  a.firstChild.textContent = it.desc;
+  return a;
+}}
+window.addEventListener('scroll', async () => {{
+  if (loading || !hasMore) return;
+  if (window.innerHeight + window.scrollY < document.body.scrollHeight - 200) return;
+  loading = true;
+  const r = await fetch('{api_path}?count={page_size}&cursor=' + cursor{api_query});
+  const data = await r.json();
+  const grid = document.getElementById('grid');
+  (data.itemList || data.item_list).forEach(it => grid.appendChild(card(it)));
+  cursor = data.cursor; hasMore = data.hasMore ?? data.has_more; loading = false;
+}});
+</script></body></html>"""
+
+CARD_TEMPLATE = '<a href="/@{author}/video/{id}" style="display:block;height:320px"><div data-e2e="video-title">{desc}</div></a>'
+
+VIDEO_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{desc} | TikTok</title>
+<meta property="og:title" content="{desc}">
+<meta property="og:video" content="{play}">
+</head><body>
+<video src="{play}"></video>
+<script id="SIGI_STATE" type="application/json">{state}</script>
+</body></html>"""
+
+
+def make_item(vid: int, base_epoch: int = 1_700_000_000) -> Dict[str, object]:
+    """Deterministic TikTok-shaped item struct for video number ``vid``."""
+    rng = random.Random(vid)
+    video_id = str(7_300_000_000_000_000_000 + vid)
+    author = f"user{vid % 50}"
+    return {
+        "id": video_id,
+        "desc": f"fixture video {vid} #fyp",
+        "createTime": base_epoch + vid * 60,
+        "author": {"uniqueId": author, "nickname": author.title(), "avatarLarger": f"/avatar/{author}.jpg"},
+        "stats": {
+            "diggCount": rng.randrange(10**6),
+            "shareCount": rng.randrange(10**4),
+            "playCount": rng.randrange(10**7),
+            "commentCount": rng.randrange(10**4),
+            "collectCount": rng.randrange(10**4),
+        },
+        "video": {"duration": rng.randrange(5, 180), "playAddr": f"/media/{video_id}.mp4"},
+        "music": {"title": f"track {vid % 30}", "authorName": f"artist {vid % 7}", "original": vid % 3 == 0},
+    }
+
+
+def make_video_page(vid: int) -> str:
+    """Server-rendered video page for video number ``vid``, with its item in SIGI_STATE."""
+    item = make_item(vid)
+    state = {
+        "ItemModule": {item["id"]: dict(item, author=item["author"]["uniqueId"])},
+        "UserModule": {"users": {item["author"]["uniqueId"]: item["author"]}},
+    }
+    return VIDEO_TEMPLATE.format(desc=item["desc"], play=item["video"]["playAddr"], state=json.dumps(state))
+
+
+def make_media(video_id: str, size: int) -> bytes:
+    """Deterministic dummy MP4 bytes (an ftyp box, then filler) for ``video_id``."""
+    head = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+    filler = f"{video_id}:".encode("ascii")
+    body = head + filler * ((size - len(head)) // len(filler) + 1)
+    return body[:size]
+
+
+class FixtureConfig:
+    def __init__(self, total: int = 200, page_size: int = 12, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, fixtures_dir: Optional[str] = None,
+                 media_bytes: int = 256 * 1024, media_truncate: float = 0.0):
+        self.total = total
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fixtures_dir = fixtures_dir
+        self.media_bytes = media_bytes
+        # Probability that a media response is cut off half-way (exercises Range resume).
+        self.media_truncate = media_truncate
+
+
+# Search results for a keyword are a window of the synthetic feed starting at a
+# keyword-dependent offset, so different keywords partly overlap.
+SEARCH_RESULTS = 60
+
+
+def search_indices(keyword: str, total: int):
+    start = zlib.crc32(keyword.encode("utf-8")) % total
+    return [(start + i) % total for i in range(min(SEARCH_RESULTS, total))]
+
+
+_VIDEO_PATH_RE = re.compile(r"^/@[^/]+/video/(\d+)")
+_MEDIA_PATH_RE = re.compile(r"^/media/(\d+)\.mp4$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Replays explore/video pages and media, either recorded ones from
+    ``fixtures_dir`` (``explore.html``, ``video/<id>.html``, ``media/<id>.mp4``)
+    or deterministic synthetic ones."""
+
+    config: FixtureConfig = FixtureConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:  # keep benchmark output clean
+        pass
+
+    def _delay(self) -> None:
+        cfg = self.config
+        delay = cfg.latency_ms + (random.uniform(-cfg.jitter_ms, cfg.jitter_ms) if cfg.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _recorded(self, name: str) -> Optional[bytes]:
+        root = self.config.fixtures_dir
+        if not root:
+            return None
+        path = os.path.join(root, name)
+        if not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _send_media(self, body: bytes) -> None:
+        """Serve ``body`` honouring a single ``Range: bytes=a-b`` header."""
+        size = len(body)
+        start, end, status = 0, size - 1, 200
+        m = _RANGE_RE.match(self.headers.get("Range", "").strip())
+        if m and (m.group(1) or m.group(2)):
+            if m.group(1):
+                start = int(m.group(1))
+                end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+            else:
+                start = max(0, size - int(m.group(2)))
+            if start >= size or start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+        chunk = body[start:end + 1]
+        self.send_response(status)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(chunk)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        if self.config.media_truncate and random.random() < self.config.media_truncate:
+            self.wfile.write(chunk[:len(chunk) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(chunk)
+
+    def _item_index(self, video_id: str) -> Optional[int]:
+        vid = int(video_id) - 7_300_000_000_000_000_000
+        return vid if 0 <= vid < self.config.total else None
+
+    def do_HEAD(self) -> None:
+        self.do_GET()
+
+    def do_GET(self) -> None:
+        self._delay()
+        url = urlsplit(self.path)
+        cfg = self.config
+
+        if url.path.rstrip("/") == "/explore":
+            body = self._recorded("explore.html")
+            if body is None:
+                count = min(cfg.page_size, cfg.total)
+                cards = "".join(
+                    CARD_TEMPLATE.format(author=it["author"]["uniqueId"], id=it["id"], desc=it["desc"])
+                    for it in (make_item(i) for i in range(count))
+                )
+                body = EXPLORE_TEMPLATE.format(
+                    cards=cards, next_cursor=count, has_more=json.dumps(count < cfg.total), page_size=cfg.page_size,
+                    api_path="/api/explore/item_list/", api_query="",
+                ).encode("utf-8")
+            return self._send(200, body, "text/html; charset=utf-8")
+
+        if url.path.rstrip("/") == "/search/video":
+            keyword = parse_qs(url.query).get("q", [""])[0]
+            indices = search_indices(keyword, cfg.total)
+            count = min(cfg.page_size, len(indices))
+            cards = "".join(
+                CARD_TEMPLATE.format(author=it["author"]["uniqueId"], id=it["id"], desc=it["desc"])
+                for it in (make_item(i) for i in indices[:count])
+            )
+            body = EXPLORE_TEMPLATE.format(
+                cards=cards, next_cursor=count, has_more=json.dumps(count < len(indices)), page_size=cfg.page_size,
+                api_path="/api/search/item/full/", api_query=" + '&keyword=' + " + json.dumps(quote(keyword)),
+            ).encode("utf-8")
+            return self._send(200, body, "text/html; charset=utf-8")
+
+        if url.path.startswith("/api/search/item/full"):
+            qs = parse_qs(url.query)
+            indices = search_indices(qs.get("keyword", [""])[0], cfg.total)
+            cursor = int(qs.get("cursor", ["0"])[0])
+            end = min(cursor + int(qs.get("count", [str(cfg.page_size)])[0]), len(indices))
+            payload = {
+                "item_list": [make_item(i) for i in indices[cursor:end]],
+                "cursor": end,
+                "has_more": end < len(indices),
+            }
+            return self._send(200, json.dumps(payload).encode("utf-8"), "application/json")
+
+        if url.path.startswith("/api/") and "item_list" in url.path:
+            qs = parse_qs(url.query)
+            cursor = int(qs.get("cursor", ["0"])[0])
+            count = int(qs.get("count", [str(cfg.page_size)])[0])
+            end = min(cursor + count, cfg.total)
+            payload = {
+                "itemList": [make_item(i) for i in range(cursor, end)],
+                "cursor": end,
+                "hasMore": end < cfg.total,
+            }
+            return self._send(200, json.dumps(payload).encode("utf-8"), "application/json")
+
+        m = _MEDIA_PATH_RE.match(url.path)
+        if m:
+            body = self._recorded(os.path.join("media", f"{m.group(1)}.mp4"))
+            if body is None:
+                if self._item_index(m.group(1)) is None:
+                    return self._send(404, b"not found", "text/plain")
+                body = make_media(m.group(1), cfg.media_bytes)
+            return self._send_media(body)
+
+        m = _VIDEO_PATH_RE.match(url.path)
+        if m:
+            body = self._recorded(os.path.join("video", f"{m.group(1)}.html"))
+            if body is None:
+                idx = self._item_index(m.group(1))
+                if idx is None:
+                    return self._send(404, b"not found", "text/plain")
+                body = make_video_page(idx).encode("utf-8")
+            return self._send(200, body, "text/html; charset=utf-8")
+
+        return self._send(404, b"not found", "text/plain")
+
+
+def start_fixture_server(config: Optional[FixtureConfig] = None, host: str = "127.0.0.1", port: int = 0):
+    """Start the fixture server on a background thread; returns (server, base_url)."""
+    handler = type("BoundFixtureHandler", (FixtureHandler,), {"config": config or FixtureConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve recorded or synthetic TikTok pages for offline benchmarks")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--total", type=int, default=200, help="Synthetic videos in the explore feed")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="Artificial latency per response")
+    ap.add_argument("--jitter-ms", type=float, default=0.0, help="Random +/- jitter on the latency")
+    ap.add_argument("--fixtures", default=None, help="Directory with explore.html and video/<id>.html recordings")
+    ap.add_argument("--media-bytes", type=int, default=256 * 1024, help="Size of each synthetic /media/<id>.mp4")
+    ap.add_argument("--media-truncate", type=float, default=0.0, help="Probability a media response is cut off")
+    args = ap.parse_args()
+
+    config = FixtureConfig(total=args.total, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                           fixtures_dir=args.fixtures, media_bytes=args.media_bytes,
+                           media_truncate=args.media_truncate)
+    server, base_url = start_fixture_server(config, port=args.port)
+    print(f"Serving fixtures at {base_url} (set TIKTOK_BASE_URL={base_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""HTTP entry point: ``gunicorn server:app`` (``web`` in the Procfile, settings in
+gunicorn.conf.py: one worker process, many threads). ``python server.py``
+runs the same app on werkzeug's development server for local use.
+
+Scrapes already run on the persistent browser executors (see
+utils.browser.run_in_browser_thread), so request threads only wait. On top
+of that, identical concurrent scrape requests (same path + query + response
+type) are coalesced into one in-flight scrape, and at most
+TIKTOK_MAX_INFLIGHT distinct scrapes run at once; further ones get 503.
+"""
+import os
+from functools import wraps
+
+from flask import Flask, Response, current_app, jsonify, request
+
+from routes.metrics_routes import metrics_bp
+from routes.tiktok_routes import NDJSON_MIMETYPE, tiktok_bp
+from utils.metrics import REGISTRY, split_stats
+from utils.singleflight import Overloaded, SingleFlight
+
+
+# Endpoints that start a browser scrape; everything else is cheap and served directly.
+SCRAPE_ENDPOINTS = ("tiktok.explore", "tiktok.search")
+
+FLIGHTS = SingleFlight(max_inflight=int(os.environ.get("TIKTOK_MAX_INFLIGHT", 4)))
+
+REGISTRY.counter_callback(
+    "tiktok_requests_total", "Scrape requests by admission outcome (leaders/shared/rejected).",
+    lambda: split_stats(FLIGHTS)[0], label="outcome",
+)
+REGISTRY.gauge_callback(
+    "tiktok_requests", "Scrape requests in flight and the admission limit.", lambda: split_stats(FLIGHTS)[1], label="stat"
+)
+
+
+def _overloaded(e: Overloaded) -> Response:
+    resp = jsonify({"error": "server busy, retry later", "detail": str(e)})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = "5"
+    return resp
+
+
+def _is_stream() -> bool:
+    value = (request.args.get("stream") or "").strip().lower()
+    return value in ("1", "true", "yes") or request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def coalesced(view):
+    """Wrap a scrape view with singleflight coalescing and the admission limit."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if _is_stream():
+            # A stream is consumed by one client; it still holds an admission slot until it closes.
+            try:
+                release = FLIGHTS.admit()
+            except Overloaded as e:
+                return _overloaded(e)
+            try:
+                resp = current_app.make_response(view(*args, **kwargs))
+            except BaseException:
+                release()
+                raise
+            resp.call_on_close(release)
+            return resp
+
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), request.accept_mimetypes.best)
+
+        def run():
+            resp = current_app.make_response(view(*args, **kwargs))
+            return resp.status_code, resp.get_data(), resp.mimetype
+
+        try:
+            (status, body, mimetype), shared = FLIGHTS.do(key, run)
+        except Overloaded as e:
+            return _overloaded(e)
+        resp = Response(body, status=status, mimetype=mimetype)
+        resp.headers["X-Coalesced"] = "1" if shared else "0"
+        return resp
+
+    return wrapper
+
+
+def create_app() -> Flask:
+    app = Flask(__name__)
+    app.json.ensure_ascii = False
+    app.register_blueprint(tiktok_bp)
+    app.register_blueprint(metrics_bp)
+    for endpoint in SCRAPE_ENDPOINTS:
+        app.view_functions[endpoint] = coalesced(app.view_functions[endpoint])
+
+    @app.get("/healthz")
+    def healthz():
+        return jsonify({"ok": True, "requests": FLIGHTS.stats()})
+
+    return app
+
+
+app = create_app()
+
+
+def main():
+    """Local development server; production runs under gunicorn (see gunicorn.conf.py)."""
+    from werkzeug.serving import run_simple
+
+    host = os.environ.get("HOST", "0.0.0.0")
+    port = int(os.environ.get("PORT", 5000))
+    # One process: browser pools, caches and in-flight scrapes are shared between request threads.
+    run_simple(host, port, app, threaded=True, use_reloader=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Host scheduler: a tripped breaker fails fast and lets one probe through after the cooldown."""
+import time
+
+import pytest
+
+from utils.scheduler import BreakerOpenError, CircuitBreaker, HostScheduler, VerifyPageError
+
+URL = "https://www.tiktok.com/@x/video/1"
+
+
+def verify_wall():
+    raise VerifyPageError(URL)
+
+
+def test_open_breaker_fails_fast():
+    scheduler = HostScheduler(rate=0, retries=2, base_delay=0.01, threshold=3, cooldown=30)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        verify_wall()
+
+    started = time.monotonic()
+    outcomes = []
+    for _ in range(50):
+        try:
+            scheduler.run(URL, fn)
+        except BreakerOpenError:
+            outcomes.append("short_circuit")
+        except VerifyPageError:
+            outcomes.append("verify")
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0
+    assert len(calls) == 3
+    assert outcomes.count("short_circuit") == 49
+    assert scheduler.stats()["www.tiktok.com"]["state"] == "open"
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+    assert breaker.failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens():
+    scheduler = HostScheduler(rate=0, retries=0, threshold=1, cooldown=0.05)
+    with pytest.raises(VerifyPageError):
+        scheduler.run(URL, verify_wall)
+    time.sleep(0.06)
+    with pytest.raises(VerifyPageError) as probe:
+        scheduler.run(URL, verify_wall)
+    assert not isinstance(probe.value, BreakerOpenError)
+    with pytest.raises(BreakerOpenError):
+        scheduler.run(URL, verify_wall)
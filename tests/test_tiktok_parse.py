@@ -0,0 +1,115 @@
+"""Offline extraction from saved/fixture HTML, and parity with the in-browser EXTRACT_JS."""
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from scrapers.tiktok_js import EXTRACT_JS
+from scrapers.tiktok_parse import (
+    TIER_NEXT_DATA,
+    TIER_OG,
+    TIER_SIGI,
+    extract_video_metadata_from_html,
+    is_verify_html,
+    parse_state_from_script,
+)
+from scripts.fixture_server import make_item, make_video_page
+
+
+def video_url(vid: int) -> str:
+    item = make_item(vid)
+    return f"https://www.tiktok.com/@{item['author']['uniqueId']}/video/{item['id']}"
+
+
+@pytest.mark.parametrize("vid", [0, 1, 7, 42])
+def test_sigi_page(vid):
+    item = make_item(vid)
+    record, tier = extract_video_metadata_from_html(make_video_page(vid), video_url(vid))
+    assert tier == TIER_SIGI
+    assert record["webVideoUrl"] == video_url(vid)
+    assert record["text"] == item["desc"]
+    for key in ("diggCount", "shareCount", "playCount", "commentCount", "collectCount"):
+        assert record[key] == item["stats"][key]
+    assert record["videoMeta.duration"] == item["video"]["duration"]
+    assert record["musicMeta.musicName"] == item["music"]["title"]
+    assert record["musicMeta.musicOriginal"] is item["music"]["original"]
+    assert record["authorMeta.name"] == item["author"]["uniqueId"]
+    assert record["authorMeta.avatar"] == item["author"]["avatarLarger"]
+    assert record["downloadUrl"] == item["video"]["playAddr"]
+
+
+def next_data_page(vid: int) -> str:
+    next_data = {"props": {"pageProps": {"itemInfo": {"itemStruct": make_item(vid)}}}}
+    return f'<html><body><script id="__NEXT_DATA__">{json.dumps(next_data)}</script></body></html>'
+
+
+def test_next_data_page():
+    item = make_item(3)
+    record, tier = extract_video_metadata_from_html(next_data_page(3), video_url(3))
+    assert tier == TIER_NEXT_DATA
+    assert record["text"] == item["desc"]
+    assert record["playCount"] == item["stats"]["playCount"]
+    assert record["authorMeta.name"] == item["author"]["uniqueId"]
+
+
+def test_og_fallback_and_empty_html():
+    html = '<html><head><meta property="og:title" content="hello"><meta property="og:video" content="/v.mp4"></head></html>'
+    record, tier = extract_video_metadata_from_html(html, "https://www.tiktok.com/@a/video/1")
+    assert tier == TIER_OG
+    assert record["text"] == "hello"
+    assert record["downloadUrl"] == "/v.mp4"
+    assert extract_video_metadata_from_html("", "u")[1] == TIER_OG
+
+
+def test_state_assignment_script():
+    state = {"ItemModule": {"1": {"id": "1"}}}
+    assert parse_state_from_script(f"window['SIGI_STATE'] = {json.dumps(state)};") == state
+
+
+def test_verify_html():
+    assert is_verify_html('<div id="captcha-verify-image"></div>')
+    assert not is_verify_html(make_video_page(0))
+
+
+# Minimal DOM for EXTRACT_JS on a fixture video page: the SIGI / Next.js scripts, <video> and OG tags.
+_NODE_HARNESS = r"""
+const fs = require('fs');
+const {html, url, extract} = JSON.parse(fs.readFileSync(0, 'utf8'));
+const sigi = html.match(/<script id="SIGI_STATE"[^>]*>([\s\S]*?)<\/script>/);
+const next = html.match(/<script id="__NEXT_DATA__"[^>]*>([\s\S]*?)<\/script>/);
+const video = html.match(/<video src="([^"]*)"/);
+const metas = {};
+for (const m of html.matchAll(/<meta property="([^"]+)" content="([^"]*)">/g)) metas[m[1]] = m[2];
+globalThis.window = {};
+globalThis.location = {href: url};
+globalThis.document = {
+  querySelector(sel) {
+    if (sel === '#SIGI_STATE' || sel.startsWith('script[id*="SIGI"]')) return sigi ? {textContent: sigi[1]} : null;
+    if (sel === '#__NEXT_DATA__') return next ? {textContent: next[1]} : null;
+    if (sel === 'video') return video ? {src: video[1]} : null;
+    const meta = sel.match(/^meta\[property="([^"]+)"\]$/);
+    if (meta) return meta[1] in metas ? {content: metas[meta[1]]} : null;
+    return null;
+  },
+  querySelectorAll() { return []; },
+};
+process.stdout.write(JSON.stringify((0, eval)('(' + extract + ')')()));
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node to run EXTRACT_JS")
+@pytest.mark.parametrize(
+    "page, vid, expected_tier",
+    [(make_video_page, 0, TIER_SIGI), (make_video_page, 5, TIER_SIGI), (make_video_page, 11, TIER_SIGI),
+     (next_data_page, 3, TIER_NEXT_DATA)],
+)
+def test_parity_with_extract_js(page, vid, expected_tier):
+    html, url = page(vid), video_url(vid)
+    payload = json.dumps({"html": html, "url": url, "extract": EXTRACT_JS})
+    out = subprocess.run(["node", "-e", _NODE_HARNESS], input=payload, capture_output=True, text=True, check=True)
+    browser = json.loads(out.stdout)
+    assert browser.pop("_tier") == expected_tier
+    record, tier = extract_video_metadata_from_html(html, url)
+    assert tier == expected_tier
+    assert {k: record.get(k) for k in browser} == browser
@@ -1,9 +1,10 @@
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
 import json
 
+from scrapers.tiktok_parse import parse_tiktok_explore
+
 # 1. 配置浏览器选项
 def setup_driver():
     options = Options()
@@ -19,34 +20,15 @@ def fetch_explore_page_html(driver, url="https://www.tiktok.com/explore?lang=cn"
     time.sleep(6)  # 视网速和反爬机制调整等待时间
     return driver.page_source
 
-# 3. 解析视频链接和信息
-def parse_tiktok_explore(html):
-    soup = BeautifulSoup(html, "lxml")
-    result = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        if "/video/" in href:
-            # 提取标题（有时可能为空）
-            title_tag = a.find("div", attrs={"data-e2e": "video-title"})
-            title = title_tag.get_text(strip=True) if title_tag else "No title"
-            result.append({
-                "url": href,
-                "title": title
-            })
-    # 去重
-    seen = set()
-    clean_result = []
-    for item in result:
-        if item["url"] not in seen:
-            seen.add(item["url"])
-            clean_result.append(item)
-    return clean_result
+# 3. 解析视频链接和信息：见 scrapers.tiktok_parse.parse_tiktok_explore（单遍 lxml 解析，自动去重）
+#    标题只取 div[data-e2e=video-title]，没有则为 "No title"
+TITLE_SOURCES = ("video-title",)
 
 # 4. 主程序
 def main():
     driver = setup_driver()
     html = fetch_explore_page_html(driver)
-    videos = parse_tiktok_explore(html)
+    videos = parse_tiktok_explore(html, title_sources=TITLE_SOURCES)
     driver.quit()
 
     print(f"✅ 抓取到 {len(videos)} 个视频链接：")
@@ -56,6 +38,6 @@ def main():
 if __name__ == "__main__":
     driver = setup_driver()
     html = fetch_explore_page_html(driver)
-    videos = parse_tiktok_explore(html)
+    videos = parse_tiktok_explore(html, title_sources=TITLE_SOURCES)
     driver.quit()
     print(json.dumps(videos, ensure_ascii=False, indent=2))
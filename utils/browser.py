@@ -1,5 +1,22 @@
+import atexit
+import contextvars
+import os
+import queue
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from playwright.sync_api import sync_playwright, Page
+from functools import partial
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page, Playwright
+
+from utils.metrics import stage
+from utils.readiness import wait_for_load_quiet
+from utils.session_store import get_session_store
 
 
 DEFAULT_UA = (
@@ -8,47 +25,643 @@ DEFAULT_UA = (
     "Chrome/115.0 Safari/537.36"
 )
 
+LAUNCH_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+]
 
-@contextmanager
-def create_page(headless: bool = True) -> Page:
-    """Create a Playwright Chromium page with sensible defaults.
 
-    - Headless by default
-    - User-Agent spoofing and 1920x1080 viewport
-    - Closes all resources automatically on exit
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Pool configuration (overridable via environment or configure_pool()).
+POOL_CONFIG = {
+    # 0 disables pooling: every create_page() launches and closes its own browser.
+    "enabled": os.environ.get("TIKTOK_BROWSER_POOL", "1") != "0",
+    # Number of persistent browser worker threads, each owning its warm browser(s).
+    "size": max(1, _env_int("TIKTOK_POOL_SIZE", 2)),
+    # Max warm browsers kept per thread (one per distinct headless/profile key).
+    "slots_per_thread": max(1, _env_int("TIKTOK_POOL_SLOTS_PER_THREAD", 2)),
+    # Recycle a browser after serving this many pages.
+    "max_pages": max(1, _env_int("TIKTOK_POOL_MAX_PAGES", 50)),
+    # Close browsers that have been idle longer than this (seconds).
+    "idle_ttl": _env_float("TIKTOK_POOL_IDLE_TTL", 300.0),
+    # Upper bound for fan-out helpers such as map_in_browser_threads().
+    "max_concurrency": max(1, _env_int("TIKTOK_MAX_CONCURRENCY", 8)),
+}
+
+
+def configure_pool(**overrides) -> Dict[str, object]:
+    """Update pool settings (see POOL_CONFIG for the available keys)."""
+    unknown = set(overrides) - set(POOL_CONFIG)
+    if unknown:
+        raise ValueError(f"unknown pool option(s): {', '.join(sorted(unknown))}")
+    POOL_CONFIG.update(overrides)
+    return dict(POOL_CONFIG)
+
+
+# Third-party analytics/telemetry hosts we never need to load.
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "analytics.tiktok.com",
+    "mon.tiktokv.com",
+    "mcs.tiktokv.com",
+    "mon-va.byteoversea.com",
+    "log.byteoversea.com",
+)
+
+# Context profiles. "default" keeps the original full-fidelity context; the
+# others shrink the viewport, disable autoplay and abort resources we never
+# read (we only look at DOM/JSON state).
+PROFILES: Dict[str, Dict[str, object]] = {
+    "default": {
+        "viewport": {"width": 1920, "height": 1080},
+        "block_types": (),
+        "block_domains": (),
+        "launch_args": (),
+    },
+    # Explore grid: keep stylesheets so lazy loading still sees a real layout.
+    "explore": {
+        "viewport": {"width": 1280, "height": 800},
+        "block_types": ("image", "media", "font"),
+        "block_domains": TRACKER_DOMAINS,
+        "launch_args": ("--autoplay-policy=user-gesture-required", "--mute-audio"),
+    },
+    # Video page metadata lives in embedded scripts; nothing visual is needed.
+    "video": {
+        "viewport": {"width": 1024, "height": 768},
+        "block_types": ("image", "media", "font", "stylesheet"),
+        "block_domains": TRACKER_DOMAINS,
+        "launch_args": ("--autoplay-policy=user-gesture-required", "--mute-audio"),
+    },
+    # Diagnose checks <video> presence, so let media through.
+    "diagnose": {
+        "viewport": {"width": 1280, "height": 800},
+        "block_types": ("image", "font"),
+        "block_domains": TRACKER_DOMAINS,
+        "launch_args": ("--mute-audio",),
+    },
+}
+
+# URL shapes of the resource types we block. Only matching requests are
+# routed: with the sync API a routed request waits until the thread owning
+# its page calls back into Playwright, so everything else must bypass Python.
+BLOCK_URL_PATTERNS: Dict[str, str] = {
+    "image": r"\.(?:png|jpe?g|gif|webp|avif|svg|ico|bmp|heic|image)(?:[?#]|$)",
+    "media": r"\.(?:mp4|webm|m4a|m4s|mp3|ogg)(?:[?#]|$)|[?&]mime_type=video_",
+    "font": r"\.(?:woff2?|ttf|otf|eot)(?:[?#]|$)",
+    "stylesheet": r"\.css(?:[?#]|$)",
+}
+
+_block_lock = threading.Lock()
+BLOCK_STATS: Dict[str, int] = {}
+
+
+def _domains_pattern(domains: Iterable[str]) -> "re.Pattern[str]":
+    """Match URLs on any of ``domains`` or their subdomains."""
+    hosts = "|".join(re.escape(d) for d in domains)
+    return re.compile(rf"^[a-z][a-z0-9+.-]*://(?:[^/?#]*\.)?(?:{hosts})(?::\d+)?(?:[/?#]|$)", re.IGNORECASE)
+
+
+def install_blocking(context: BrowserContext, block_types: Iterable[str], block_domains: Iterable[str]) -> None:
+    """Abort requests for blocked resource types (by URL, see BLOCK_URL_PATTERNS) or hosts."""
+    block_types = tuple(block_types)
+    block_domains = tuple(block_domains)
+    unknown = set(block_types) - set(BLOCK_URL_PATTERNS)
+    if unknown:
+        raise ValueError(f"no URL pattern for blocked type(s): {', '.join(sorted(unknown))}")
+
+    def abort(reason: str, route) -> None:
+        with _block_lock:
+            BLOCK_STATS[reason] = BLOCK_STATS.get(reason, 0) + 1
+        route.abort()
+
+    # Later routes take precedence, so host blocking (registered last) is counted as "domain".
+    for kind in block_types:
+        context.route(re.compile(BLOCK_URL_PATTERNS[kind], re.IGNORECASE), partial(abort, kind))
+    if block_domains:
+        context.route(_domains_pattern(block_domains), partial(abort, "domain"))
+
+
+def _profile(name: str) -> Dict[str, object]:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown browser profile: {name}") from None
+
+
+def _launch_args(profile: str) -> List[str]:
+    return LAUNCH_ARGS + list(_profile(profile)["launch_args"])
+
+
+class _ContextSession:
+    """Which stored session a context was created from (see utils.session_store)."""
+
+    def __init__(self, name: str, warm: bool, consented: bool):
+        self.name = name
+        self.warm = warm
+        self.consented = consented
+
+
+# A pooled context re-saves its storage state after its first page and then every N pages.
+SESSION_SAVE_EVERY = 10
+
+_context_sessions: "weakref.WeakKeyDictionary[BrowserContext, _ContextSession]" = weakref.WeakKeyDictionary()
+
+
+# Scripts added to every new context (see register_init_script()).
+_init_scripts: List[str] = []
+
+
+def register_init_script(source: str) -> None:
+    """Run ``source`` in every document of contexts created from now on, before the page's own scripts.
+
+    Lets callers install page-side helpers once per context instead of
+    sending their source with every evaluate().
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=headless,
-            args=[
-                "--disable-blink-features=AutomationControlled",
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-gpu",
-            ],
+    if source not in _init_scripts:
+        _init_scripts.append(source)
+
+
+def _new_context(browser: Browser, profile: str = "default") -> BrowserContext:
+    opts = _profile(profile)
+    store = get_session_store()
+    name, state = store.checkout() if store is not None else (None, None)
+    context = browser.new_context(
+        storage_state=state,
+        user_agent=DEFAULT_UA,
+        viewport=opts["viewport"],
+        locale="zh-CN",
+        timezone_id="Asia/Shanghai",
+        extra_http_headers={
+            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+        },
+    )
+    install_blocking(context, opts["block_types"], opts["block_domains"])
+    for script in _init_scripts:
+        context.add_init_script(script)
+    if name is not None:
+        _context_sessions[context] = _ContextSession(
+            name, warm=state is not None, consented=state is not None and store.is_consented(name)
         )
-        context = browser.new_context(
-            user_agent=DEFAULT_UA,
-            viewport={"width": 1920, "height": 1080},
-            locale="zh-CN",
-            timezone_id="Asia/Shanghai",
-            extra_http_headers={
-                "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            },
+    return context
+
+
+def save_session(context: BrowserContext) -> bool:
+    """Persist the context's cookies/localStorage to its stored session."""
+    session = _context_sessions.get(context)
+    store = get_session_store()
+    if session is None or store is None:
+        return False
+    try:
+        state = context.storage_state()
+    except Exception:
+        return False
+    store.save(session.name, state, consented=session.consented)
+    return True
+
+
+def rotate_session(context: BrowserContext) -> None:
+    """Retire the context's stored session (e.g. after a verify page) and switch to another.
+
+    Cookies are swapped in place, so the page can be reused right away.
+    """
+    try:
+        context.clear_cookies()
+    except Exception:
+        pass
+    session = _context_sessions.get(context)
+    store = get_session_store()
+    if session is None or store is None:
+        return
+    store.discard(session.name)
+    name, state = store.checkout()
+    if state is not None:
+        try:
+            context.add_cookies(state.get("cookies") or [])
+        except Exception:
+            state = None
+    _context_sessions[context] = _ContextSession(
+        name, warm=state is not None, consented=state is not None and store.is_consented(name)
+    )
+
+
+def session_consented(page: Page) -> bool:
+    """True when the page's context was restored from a session that accepted the cookie banner."""
+    session = _context_sessions.get(page.context)
+    return session is not None and session.consented
+
+
+def mark_session_consented(page: Page) -> None:
+    """Record that the cookie banner was accepted; saved with the session on its next save."""
+    session = _context_sessions.get(page.context)
+    if session is not None and not session.consented:
+        session.consented = True
+        save_session(page.context)
+
+
+class _Slot:
+    """A warm browser + context pair owned by a single thread."""
+
+    def __init__(self, key: Tuple, browser: Browser, context: BrowserContext):
+        self.key = key
+        self.browser = browser
+        self.context = context
+        self.pages_served = 0
+        self.last_used = time.monotonic()
+        self.in_use = False
+        self.closed = False
+        context.on("close", lambda _context: setattr(self, "closed", True))
+
+    def healthy(self) -> bool:
+        """Cheap check on checkout; BrowserPool.page() still replaces a slot whose new_page() fails."""
+        try:
+            return not self.closed and self.browser.is_connected()
+        except Exception:
+            return False
+
+    def close(self) -> None:
+        save_session(self.context)
+        for closable in (self.context, self.browser):
+            try:
+                closable.close()
+            except Exception:
+                pass
+
+
+class BrowserPool:
+    """Warm Chromium browsers/contexts for the calling thread.
+
+    Sync Playwright objects are bound to the thread that created them, so each
+    thread gets its own pool (see get_pool()). Slots are keyed by launch/context
+    options, health-checked on checkout, recycled after ``max_pages`` pages and
+    evicted after ``idle_ttl`` seconds without use.
+    """
+
+    def __init__(self, slots: int = 2, max_pages: int = 50, idle_ttl: float = 300.0):
+        self.thread_name = ""
+        self.slots = slots
+        self.max_pages = max_pages
+        self.idle_ttl = idle_ttl
+        self._playwright: Optional[Playwright] = None
+        self._slots: List[_Slot] = []
+        self.launches = 0
+        self.checkouts = 0
+
+    def _ensure_playwright(self) -> Playwright:
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        return self._playwright
+
+    def _launch(self, key: Tuple) -> _Slot:
+        headless, profile = key
+        with stage("browser_launch"):
+            browser = self._ensure_playwright().chromium.launch(headless=headless, args=_launch_args(profile))
+            context = _new_context(browser, profile)
+        self.launches += 1
+        return _Slot(key, browser, context)
+
+    def _evict(self, slot: _Slot) -> None:
+        slot.close()
+        if slot in self._slots:
+            self._slots.remove(slot)
+
+    def _stale(self) -> List[_Slot]:
+        now = time.monotonic()
+        return [s for s in self._slots if not s.in_use and now - s.last_used > self.idle_ttl]
+
+    def needs_sweep(self) -> bool:
+        """True when nothing is checked out and some slot is past ``idle_ttl`` (see _sweep_executors())."""
+        return not any(s.in_use for s in self._slots) and bool(self._stale())
+
+    def evict_idle(self) -> int:
+        """Close idle slots past ``idle_ttl``; return how many were evicted."""
+        stale = self._stale()
+        for slot in stale:
+            self._evict(slot)
+        return len(stale)
+
+    def acquire(self, headless: bool = True, profile: str = "default") -> _Slot:
+        key = (headless, profile)
+        self.evict_idle()
+        slot = next((s for s in self._slots if s.key == key and not s.in_use), None)
+        if slot is not None and not slot.healthy():
+            self._evict(slot)
+            slot = None
+        if slot is None:
+            idle = [s for s in self._slots if not s.in_use]
+            while idle and len(self._slots) >= self.slots:
+                # Make room by dropping the least recently used idle slot.
+                oldest = min(idle, key=lambda s: s.last_used)
+                self._evict(oldest)
+                idle.remove(oldest)
+            slot = self._launch(key)
+            self._slots.append(slot)
+        slot.in_use = True
+        self.checkouts += 1
+        return slot
+
+    def release(self, slot: _Slot) -> None:
+        slot.in_use = False
+        slot.pages_served += 1
+        slot.last_used = time.monotonic()
+        if slot.pages_served % SESSION_SAVE_EVERY == 1:
+            save_session(slot.context)
+        if slot.pages_served >= self.max_pages or not slot.healthy():
+            self._evict(slot)
+        self.evict_idle()
+
+    def _open_page(self, headless: bool, profile: str) -> Tuple[_Slot, Page]:
+        """Check out a slot and open a page on it, replacing the slot once if new_page() fails."""
+        slot = self.acquire(headless=headless, profile=profile)
+        try:
+            return slot, slot.context.new_page()
+        except Exception:
+            # The context or browser died without an event we saw (e.g. a crash).
+            slot.in_use = False
+            self._evict(slot)
+        slot = self.acquire(headless=headless, profile=profile)
+        try:
+            return slot, slot.context.new_page()
+        except BaseException:
+            self.release(slot)
+            raise
+
+    @contextmanager
+    def page(self, headless: bool = True, profile: str = "default"):
+        slot, page = self._open_page(headless, profile)
+        try:
+            yield page
+        finally:
+            try:
+                page.close()
+            except Exception:
+                pass
+            self.release(slot)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "slots": len(self._slots),
+            "in_use": sum(1 for s in self._slots if s.in_use),
+            "launches": self.launches,
+            "checkouts": self.checkouts,
+        }
+
+    def close(self) -> None:
+        for slot in list(self._slots):
+            self._evict(slot)
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
+_local = threading.local()
+_pools_lock = threading.Lock()
+_pools: List[BrowserPool] = []
+
+
+def get_pool() -> BrowserPool:
+    """Return the warm browser pool owned by the current thread."""
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = BrowserPool(
+            slots=int(POOL_CONFIG["slots_per_thread"]),
+            max_pages=int(POOL_CONFIG["max_pages"]),
+            idle_ttl=float(POOL_CONFIG["idle_ttl"]),
         )
+        pool.thread_name = threading.current_thread().name
+        _local.pool = pool
+        with _pools_lock:
+            _pools.append(pool)
+    return pool
+
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executor_lock = threading.Lock()
+
+
+def browser_executor(name: str = "default", workers: Optional[int] = None) -> ThreadPoolExecutor:
+    """Persistent worker threads whose thread-local pools stay warm between calls.
+
+    Separate names get separate executors, so a scrape running on the
+    "default" executor can fan work out to another one without deadlocking.
+    """
+    with _executor_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=int(workers or POOL_CONFIG["size"]),
+                thread_name_prefix=f"browser-{name}",
+            )
+            _executors[name] = executor
+            _start_janitor()
+        return executor
+
+
+# Browsers on executor threads that get no work would never reach acquire()/release(),
+# where idle slots are evicted, so a janitor thread periodically sends them a sweep.
+_janitor_stop = threading.Event()
+_janitor: Optional[threading.Thread] = None
+
+
+def _sweep_current_thread(barrier: threading.Barrier) -> None:
+    pool = getattr(_local, "pool", None)
+    if pool is not None:
+        pool.evict_idle()
+    try:
+        # Hold this thread until the other sweeps are picked up, so each lands on a different thread.
+        barrier.wait(timeout=0.5)
+    except threading.BrokenBarrierError:
+        pass
+
+
+def _sweep_executors() -> None:
+    """Submit one eviction sweep per executor thread whose pool has stale idle slots."""
+    with _pools_lock:
+        pools = list(_pools)
+    with _executor_lock:
+        executors = list(_executors.items())
+    for name, executor in executors:
+        prefix = f"browser-{name}_"
+        idle = sum(1 for pool in pools if pool.thread_name.startswith(prefix) and pool.needs_sweep())
+        if idle:
+            barrier = threading.Barrier(idle)
+            for _ in range(idle):
+                executor.submit(_sweep_current_thread, barrier)
+
+
+def _janitor_loop() -> None:
+    while not _janitor_stop.wait(max(1.0, float(POOL_CONFIG["idle_ttl"]) / 2)):
+        try:
+            _sweep_executors()
+        except RuntimeError:  # executor shut down at exit
+            return
+
+
+def _start_janitor() -> None:
+    global _janitor
+    if _janitor is None:
+        _janitor = threading.Thread(target=_janitor_loop, name="browser-janitor", daemon=True)
+        _janitor.start()
+
+
+def run_in_browser_thread(fn, *args, **kwargs):
+    """Run ``fn`` on a persistent browser thread and wait for its result.
+
+    Use this from short-lived threads (e.g. Flask request handlers) so the
+    browser launched by create_page() is reused by the next call.
+    """
+    ctx = contextvars.copy_context()
+    return browser_executor().submit(ctx.run, fn, *args, **kwargs).result()
+
+
+def iter_in_browser_thread(gen_fn, *args, **kwargs) -> Iterator:
+    """Run generator ``gen_fn`` on a persistent browser thread, yielding its items here.
+
+    The producer starts immediately (inheriting the caller's contextvars) and
+    hands items over through a queue as soon as they are produced. Closing
+    the returned iterator early tells the producer to stop after its current
+    item (which also releases its page).
+    """
+    handoff: "queue.Queue[tuple]" = queue.Queue()
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in gen_fn(*args, **kwargs):
+                handoff.put(("item", item))
+                if stop.is_set():
+                    break
+        except BaseException as e:  # re-raised in the consuming thread
+            handoff.put(("error", e))
+            return
+        handoff.put(("done", None))
+
+    browser_executor().submit(contextvars.copy_context().run, produce)
+    return _drain_handoff(handoff, stop)
+
+
+def _drain_handoff(handoff: "queue.Queue[tuple]", stop: threading.Event) -> Iterator:
+    try:
+        while True:
+            kind, value = handoff.get()
+            if kind == "item":
+                yield value
+            elif kind == "error":
+                raise value
+            else:
+                return
+    finally:
+        stop.set()
+
+
+def imap_in_browser_threads(fn, items: Iterable, concurrency: int, name: str = "extract") -> Iterator:
+    """Apply ``fn`` to ``items`` on warm browser threads, at most ``concurrency`` at once.
+
+    Results are yielded in input order as soon as each one (and all before
+    it) is ready.
+    """
+    concurrency = max(1, min(int(concurrency), int(POOL_CONFIG["max_concurrency"])))
+    executor = browser_executor(name, workers=int(POOL_CONFIG["max_concurrency"]))
+    window: Deque = deque()
+    try:
+        for item in items:
+            # Each task gets its own context copy (one Context can't run on two threads).
+            window.append(executor.submit(contextvars.copy_context().run, fn, item))
+            if len(window) >= concurrency:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+    finally:
+        for future in window:
+            future.cancel()
+
+
+def map_in_browser_threads(fn, items: Iterable, concurrency: int, name: str = "extract") -> List:
+    """List version of imap_in_browser_threads(); results come back in input order."""
+    return list(imap_in_browser_threads(fn, items, concurrency, name=name))
+
+
+@atexit.register
+def _shutdown_pools() -> None:
+    _janitor_stop.set()
+    with _executor_lock:
+        executors = list(_executors.values())
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
+    with _pools_lock:
+        pools = list(_pools)
+    for pool in pools:
+        # Best effort: pools owned by other threads may refuse cross-thread close.
+        try:
+            pool.close()
+        except Exception:
+            pass
+
+
+@contextmanager
+def _launch_page(headless: bool = True, profile: str = "default"):
+    with sync_playwright() as p:
+        with stage("browser_launch"):
+            browser = p.chromium.launch(headless=headless, args=_launch_args(profile))
+            context = _new_context(browser, profile)
         page = context.new_page()
         try:
             yield page
         finally:
+            save_session(context)
             context.close()
             browser.close()
 
 
+@contextmanager
+def create_page(headless: bool = True, pooled: Optional[bool] = None, profile: str = "default") -> Page:
+    """Create a Playwright Chromium page with sensible defaults.
+
+    - Headless by default
+    - User-Agent spoofing and 1920x1080 viewport
+    - ``profile`` picks a PROFILES preset ("explore", "video", "diagnose" use a
+      smaller viewport, no autoplay and abort images/media/fonts/trackers)
+    - Checks a page out of the current thread's warm BrowserPool (unless
+      pooling is disabled) and returns it on exit
+    """
+    if pooled is None:
+        pooled = bool(POOL_CONFIG["enabled"])
+    if not pooled:
+        with _launch_page(headless=headless, profile=profile) as page:
+            yield page
+        return
+    with get_pool().page(headless=headless, profile=profile) as page:
+        yield page
+
+
 def get_page_content(url: str, wait_ms: int = 6000, headless: bool = True) -> str:
-    """Open a URL and return final HTML content using Playwright."""
+    """Open a URL and return final HTML content using Playwright.
+
+    ``wait_ms`` is an upper bound: returns as soon as the network goes idle.
+    """
     with create_page(headless=headless) as page:
         page.goto(url, wait_until="load", timeout=60_000)
-        page.wait_for_timeout(wait_ms)
+        wait_for_load_quiet(page, timeout_ms=wait_ms)
         return page.content()
 
 
@@ -64,5 +677,3 @@ def init_chrome_driver(*_args, **_kwargs):  # pragma: no cover
     raise RuntimeError(
         "Selenium 已被移除，请改用 Playwright。使用 utils.browser.create_page() 或 get_page_content()。"
     )
-
-
@@ -0,0 +1,190 @@
+"""TTL + LRU cache for video metadata keyed by numeric video ID.
+
+Static fields (author, music, text, createTimeISO, ...) and fast-moving
+counters (diggCount, playCount, ...) have separate freshness windows: a
+record is only served while both are fresh. ``refresh_stats`` renews just
+the counters (e.g. from a feed response) while the static part is still
+fresh, and the static part of a stale record is available as a fallback via
+``get_static``. An optional SQLite tier keeps entries across process restarts.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+STATS_FIELDS = ("diggCount", "shareCount", "playCount", "commentCount", "collectCount")
+
+COUNTERS = ("hits", "disk_hits", "misses", "stale", "puts", "stats_refreshes")
+
+
+def _is_useful(record: Dict[str, object]) -> bool:
+    # {"webVideoUrl": href} is the failure fallback; never cache it.
+    return any(k != "webVideoUrl" and v for k, v in record.items())
+
+
+class MetadataCache:
+    """In-memory LRU with per-field-group TTLs and an optional on-disk tier."""
+
+    def __init__(
+        self,
+        max_items: int = 2048,
+        static_ttl: float = 24 * 3600,
+        stats_ttl: float = 600,
+        db_path: Optional[str] = None,
+    ):
+        self.max_items = max_items
+        self.static_ttl = static_ttl
+        self.stats_ttl = stats_ttl
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # video_id -> (record, static_at, stats_at); timestamps are wall-clock
+        # so they stay meaningful after a round trip through SQLite.
+        self._mem: "OrderedDict[str, tuple]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS video_cache ("
+                " video_id TEXT PRIMARY KEY, record TEXT NOT NULL,"
+                " static_at REAL NOT NULL, stats_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _load(self, video_id: str) -> Optional[tuple]:
+        entry = self._mem.get(video_id)
+        if entry is not None:
+            self._mem.move_to_end(video_id)
+            return entry
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT record, static_at, stats_at FROM video_cache WHERE video_id = ?", (video_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        entry = (json.loads(row[0]), row[1], row[2])
+        self._remember(video_id, entry)
+        self.counters["disk_hits"] += 1
+        return entry
+
+    def _remember(self, video_id: str, entry: tuple) -> None:
+        self._mem[video_id] = entry
+        self._mem.move_to_end(video_id)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def get(self, video_id: str) -> Optional[Dict[str, object]]:
+        """Return a copy of the record if static and counter fields are both fresh."""
+        now = time.time()
+        with self._lock:
+            entry = self._load(video_id)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            record, static_at, stats_at = entry
+            if now - static_at > self.static_ttl or now - stats_at > self.stats_ttl:
+                self.counters["stale"] += 1
+                self.counters["misses"] += 1
+                return None
+            self.counters["hits"] += 1
+            return dict(record)
+
+    def get_static(self, video_id: str) -> Optional[Dict[str, object]]:
+        """Return only the static fields of a cached record while they are fresh."""
+        now = time.time()
+        with self._lock:
+            entry = self._load(video_id)
+            if entry is None or now - entry[1] > self.static_ttl:
+                return None
+            return {k: v for k, v in entry[0].items() if k not in STATS_FIELDS}
+
+    def put(self, video_id: str, record: Dict[str, object]) -> bool:
+        """Store a freshly extracted record; returns False for fallback-only records."""
+        if not video_id or not _is_useful(record):
+            return False
+        now = time.time()
+        entry = (dict(record), now, now)
+        with self._lock:
+            self._remember(video_id, entry)
+            self.counters["puts"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO video_cache (video_id, record, static_at, stats_at) VALUES (?, ?, ?, ?)",
+                    (video_id, json.dumps(entry[0], ensure_ascii=False), now, now),
+                )
+                self._db.commit()
+        return True
+
+    def refresh_stats(self, video_id: str, stats: Dict[str, object]) -> Optional[Dict[str, object]]:
+        """Replace the counter fields of a record whose static fields are still fresh.
+
+        Returns a copy of the updated record, or None when there is no such
+        record (the caller has to extract it in full).
+        """
+        stats = {k: v for k, v in stats.items() if k in STATS_FIELDS}
+        if not video_id or not stats:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._load(video_id)
+            if entry is None or now - entry[1] > self.static_ttl:
+                return None
+            record, static_at = dict(entry[0], **stats), entry[1]
+            self._remember(video_id, (record, static_at, now))
+            self.counters["stats_refreshes"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "UPDATE video_cache SET record = ?, stats_at = ? WHERE video_id = ?",
+                    (json.dumps(record, ensure_ascii=False), now, video_id),
+                )
+                self._db.commit()
+            return dict(record)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            out: Dict[str, object] = dict(self.counters)
+            out["size"] = len(self._mem)
+            lookups = out["hits"] + out["misses"]
+            out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+            out["disk"] = bool(self._db)
+            return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM video_cache")
+                self._db.commit()
+
+
+_cache: Optional[MetadataCache] = None
+_cache_lock = threading.Lock()
+
+
+def current_cache() -> Optional[MetadataCache]:
+    """The cache if something already built it, without opening TIKTOK_CACHE_DB."""
+    return _cache
+
+
+def get_cache() -> MetadataCache:
+    """Process-wide metadata cache, configured from the environment.
+
+    - TIKTOK_CACHE_SIZE: max in-memory entries (default 2048)
+    - TIKTOK_CACHE_STATIC_TTL / TIKTOK_CACHE_STATS_TTL: seconds (default 86400 / 600)
+    - TIKTOK_CACHE_DB: path to a SQLite file to enable the on-disk tier
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MetadataCache(
+                max_items=int(os.environ.get("TIKTOK_CACHE_SIZE", 2048)),
+                static_ttl=float(os.environ.get("TIKTOK_CACHE_STATIC_TTL", 24 * 3600)),
+                stats_ttl=float(os.environ.get("TIKTOK_CACHE_STATS_TTL", 600)),
+                db_path=os.environ.get("TIKTOK_CACHE_DB") or None,
+            )
+        return _cache
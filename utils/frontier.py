@@ -0,0 +1,131 @@
+"""Persistent crawl frontier: the set of video IDs earlier runs have seen.
+
+Each ID keeps a first-seen and a last-refreshed timestamp in SQLite, so
+repeated explore runs can skip videos they already extracted and only
+revisit those whose stats are due for a refresh. Marks are committed in
+batches (``commit_every``) and on flush().
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class CrawlFrontier:
+    """SQLite-backed seen-index of video IDs."""
+
+    def __init__(self, db_path: str, refresh_after: float = 6 * 3600, commit_every: int = 50):
+        self.db_path = db_path
+        self.refresh_after = refresh_after
+        self.commit_every = max(1, commit_every)
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+        self.counters = {"new": 0, "due": 0, "skipped": 0, "marked": 0}
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        # last_refreshed is NULL until a run extracted a usable record for the ID.
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen_videos ("
+            " video_id TEXT PRIMARY KEY, first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL, last_refreshed REAL)"
+        )
+        self._db.commit()
+
+    def is_due(self, video_id: str) -> bool:
+        """True for IDs never seen before or whose last refresh is older than ``refresh_after``."""
+        if not video_id:
+            return True
+        with self._lock:
+            row = self._db.execute(
+                "SELECT last_refreshed FROM seen_videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if row is None:
+                self.counters["new"] += 1
+                return True
+            if row[0] is None or time.time() - row[0] > self.refresh_after:
+                self.counters["due"] += 1
+                return True
+            self.counters["skipped"] += 1
+            return False
+
+    def mark(self, video_id: str, refreshed: bool = True) -> None:
+        """Record that ``video_id`` was seen now (and refreshed, if its record was usable)."""
+        if not video_id:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO seen_videos (video_id, first_seen, last_seen, last_refreshed) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(video_id) DO UPDATE SET last_seen = excluded.last_seen,"
+                " last_refreshed = COALESCE(excluded.last_refreshed, last_refreshed)",
+                (video_id, now, now, now if refreshed else None),
+            )
+            self.counters["marked"] += 1
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self._commit()
+
+    def flush(self) -> None:
+        """Commit marks still pending from the current batch."""
+        with self._lock:
+            self._commit()
+
+    def _commit(self) -> None:
+        if self._uncommitted:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def get(self, video_id: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT first_seen, last_seen, last_refreshed FROM seen_videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"firstSeen": row[0], "lastSeen": row[1], "lastRefreshed": row[2]}
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            out: Dict[str, object] = dict(self.counters)
+            out["size"] = self._db.execute("SELECT COUNT(*) FROM seen_videos").fetchone()[0]
+            out["refresh_after"] = self.refresh_after
+            return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM seen_videos")
+            self._db.commit()
+            self._uncommitted = 0
+
+
+_frontier: Optional[CrawlFrontier] = None
+_frontier_lock = threading.Lock()
+
+
+def frontier_enabled() -> bool:
+    """Whether every explore run records its videos (TIKTOK_FRONTIER=1 or TIKTOK_FRONTIER_DB set).
+
+    Runs with ``only_new`` always use the frontier.
+    """
+    return os.environ.get("TIKTOK_FRONTIER") == "1" or bool(os.environ.get("TIKTOK_FRONTIER_DB"))
+
+
+def current_frontier() -> Optional[CrawlFrontier]:
+    """The frontier if something already opened it, without creating the database."""
+    return _frontier
+
+
+def get_frontier() -> CrawlFrontier:
+    """Process-wide crawl frontier, configured from the environment.
+
+    - TIKTOK_FRONTIER_DB: SQLite file (default tiktok_frontier.db)
+    - TIKTOK_FRONTIER_REFRESH: seconds before a seen video is due for a stats refresh (default 21600)
+    """
+    global _frontier
+    with _frontier_lock:
+        if _frontier is None:
+            _frontier = CrawlFrontier(
+                db_path=os.environ.get("TIKTOK_FRONTIER_DB") or "tiktok_frontier.db",
+                refresh_after=float(os.environ.get("TIKTOK_FRONTIER_REFRESH", 6 * 3600)),
+            )
+        return _frontier
@@ -0,0 +1,42 @@
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.browser import DEFAULT_UA
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": DEFAULT_UA,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size: int = 16) -> requests.Session:
+    """Return the shared keep-alive HTTP session.
+
+    Connections are pooled per host, so repeated fetches from TikTok reuse
+    open TLS connections instead of handshaking for every video.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+        return _session
+
+
+def fetch_html(url: str, timeout: float = 15.0) -> str:
+    """GET a page over the shared session and return its text (raises on HTTP errors)."""
+    resp = get_session().get(url, timeout=timeout)
+    resp.raise_for_status()
+    return resp.text
@@ -0,0 +1,223 @@
+"""Prometheus-style counters/histograms and per-stage timing hooks.
+
+Wrap pipeline stages in ``with stage("goto"):`` to feed the
+``tiktok_stage_seconds`` histogram. Inside a ``timing_scope()`` the same
+stages are also summed into a per-request breakdown; the scope follows work
+onto browser threads because the executors in utils.browser copy the
+caller's contextvars.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_fmt_labels(key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, seconds: float, **labels) -> None:
+        key = _key(labels)
+        idx = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            row = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            row[idx] += 1
+            row[-1] += seconds
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, row in sorted(self._values.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, row):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_fmt_labels(key, ('le', f'{bound:g}'))} {cumulative:g}")
+                cumulative += row[len(self.buckets)]
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, ('le', '+Inf'))} {cumulative:g}")
+                lines.append(f"{self.name}_sum{_fmt_labels(key)} {row[-1]:.6f}")
+                lines.append(f"{self.name}_count{_fmt_labels(key)} {cumulative:g}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[object] = []
+        # (name, help, fn, label, "gauge" | "counter") families computed at scrape time
+        self._callbacks: List[Tuple[str, str, Callable[[], Dict[str, float]], str, str]] = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        metric = Counter(name, help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge_callback(self, name: str, help_text: str, fn: Callable[[], Dict[str, float]], label: str = "key") -> None:
+        """Register a gauge family computed at scrape time: ``fn() -> {label value: number}``."""
+        self._callbacks.append((name, help_text, fn, label, "gauge"))
+
+    def counter_callback(self, name: str, help_text: str, fn: Callable[[], Dict[str, float]], label: str = "key") -> None:
+        """Like gauge_callback() for values that only grow (e.g. a component's hit counters); name ends in _total."""
+        self._callbacks.append((name, help_text, fn, label, "counter"))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help_text, fn, label, kind in self._callbacks:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            try:
+                values = fn()
+            except Exception:
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    lines.append(f"{name}{_fmt_labels(((label, str(key)),))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram("tiktok_stage_seconds", "Time spent per scrape pipeline stage.")
+EXTRACT_TIER = REGISTRY.counter(
+    "tiktok_extract_tier_total", "Video extractions by the data source that succeeded (sigi/next_data/ld_json/og)."
+)
+TIMEOUTS = REGISTRY.counter("tiktok_timeouts_total", "Waits and navigations that hit their timeout, by stage.")
+FALLBACKS = REGISTRY.counter("tiktok_fallbacks_total", "Degraded paths taken, by kind.")
+RETRIES = REGISTRY.counter("tiktok_retries_total", "Scheduled requests retried after a failure, by host.")
+VERIFY_PAGES = REGISTRY.counter("tiktok_verify_pages_total", "Captcha/verify pages detected, by source.")
+BREAKER_TRIPS = REGISTRY.counter("tiktok_breaker_trips_total", "Circuit breaker trips after repeated verify pages, by host.")
+DOWNLOADS = REGISTRY.counter("tiktok_downloads_total", "Video downloads by outcome (downloaded/resumed/exists/failed/...).")
+DOWNLOAD_BYTES = REGISTRY.counter("tiktok_download_bytes_total", "Media bytes written to disk by the downloader.")
+
+
+class _Breakdown:
+    """Per-request totals: {stage: [count, seconds]} plus counters."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages: Dict[str, List[float]] = {}
+        self.counts: Dict[str, int] = {}
+        self.started = time.perf_counter()
+
+    def as_dict(self) -> Dict[str, object]:
+        with self.lock:
+            return {
+                "totalMs": round((time.perf_counter() - self.started) * 1000, 1),
+                "stages": {
+                    name: {"count": int(count), "ms": round(seconds * 1000, 1)}
+                    for name, (count, seconds) in sorted(self.stages.items())
+                },
+                "counts": dict(sorted(self.counts.items())),
+            }
+
+
+_current: contextvars.ContextVar[Optional[_Breakdown]] = contextvars.ContextVar("tiktok_timings", default=None)
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=name)
+    breakdown = _current.get()
+    if breakdown is not None:
+        with breakdown.lock:
+            row = breakdown.stages.setdefault(name, [0, 0.0])
+            row[0] += 1
+            row[1] += seconds
+
+
+def count(counter: Counter, **labels) -> None:
+    """Increment ``counter`` and mirror it into the active per-request breakdown."""
+    counter.inc(**labels)
+    breakdown = _current.get()
+    if breakdown is not None:
+        name = counter.name.replace("tiktok_", "").replace("_total", "")
+        key = ".".join([name] + [str(v) for _, v in sorted(labels.items())])
+        with breakdown.lock:
+            breakdown.counts[key] = breakdown.counts.get(key, 0) + 1
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as pipeline stage ``name``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started)
+
+
+@contextmanager
+def timing_scope() -> Iterator[_Breakdown]:
+    """Collect a per-request stage breakdown for everything run inside the block."""
+    breakdown = _Breakdown()
+    token = _current.set(breakdown)
+    try:
+        yield breakdown
+    finally:
+        _current.reset(token)
+
+
+def split_stats(component) -> Tuple[Dict[str, object], Dict[str, object]]:
+    """Split ``component.stats()`` into (counters, gauges) by its ``counters`` keys; ({}, {}) for None."""
+    if component is None:
+        return {}, {}
+    stats = component.stats()
+    counters = {k: v for k, v in stats.items() if k in component.counters}
+    return counters, {k: v for k, v in stats.items() if k not in counters}
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,55 @@
+"""Thread-safe token buckets for bandwidth and request-rate limits."""
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second up to ``capacity``; ``rate`` <= 0 means unlimited.
+
+    ``acquire(n)`` blocks until ``n`` tokens are available. Requests larger
+    than the capacity are let through once the bucket is full, which puts
+    the bucket into debt instead of waiting forever.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take ``tokens`` if they are available right now."""
+        if self.unlimited:
+            return True
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= min(tokens, self.capacity):
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are taken; returns the seconds spent waiting."""
+        if self.unlimited:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                needed = min(tokens, self.capacity)
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
@@ -0,0 +1,223 @@
+"""Event-driven page readiness checks.
+
+Each helper returns as soon as the page is actually usable (embedded state
+present, link count settled, feed requests finished) instead of sleeping for
+a fixed time. ``timeout_ms`` is only an upper bound (clamped to >= 1ms, since
+Playwright treats 0 as "no timeout"), and every wait records how long it
+really took in READINESS_STATS.
+"""
+import re
+import threading
+import time
+from typing import Dict, Optional, Pattern, Union
+
+from playwright.sync_api import Page
+
+from utils.metrics import TIMEOUTS, count, observe_stage
+
+
+# JS predicates for page kinds we know how to recognise as "ready".
+READY_PREDICATES = {
+    # Video page: embedded item state (or a structured-data fallback) exists.
+    "video": (
+        "() => !!((window.SIGI_STATE && window.SIGI_STATE.ItemModule) || "
+        "document.querySelector('#SIGI_STATE') || document.querySelector('#__NEXT_DATA__') || "
+        "document.querySelector('script[type=\"application/ld+json\"]'))"
+    ),
+    # Explore/search grid: at least one video link rendered.
+    "explore": "() => !!document.querySelector('a[href*=\"/video/\"]')",
+    # Diagnose wants the player element too.
+    "player": "() => !!document.querySelector('video')",
+}
+
+_STABLE_COUNT_JS = """
+([sel, quietMs, minCount]) => {
+  const n = document.querySelectorAll(sel).length;
+  const now = performance.now();
+  const w = window.__readyStable || (window.__readyStable = { n: -1, t: now });
+  if (n !== w.n) { w.n = n; w.t = now; return false; }
+  return n >= minCount && (now - w.t) >= quietMs;
+}
+"""
+
+# Captcha/verify interstitial: known widget selectors first, then one pass over
+# the page's visible text nodes (skipping script/style), reading at most
+# ``maxChars`` characters, so the cost is linear and bounded on any page.
+VERIFY_PAGE_JS = r"""
+(maxChars) => {
+  if (document.querySelector('#tiktok-verify-ele, [data-e2e*="captcha"], [id*="captcha"], ' +
+                             '#captcha-verify-image, .captcha_verify_container')) return true;
+  const re = /verify you|verify to continue|access denied|安全验证|拖动滑块/i;
+  if (re.test(document.title || '')) return true;
+  const root = document.body || document.documentElement;
+  if (!root) return false;
+  const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+  let budget = maxChars > 0 ? maxChars : Infinity;
+  let node;
+  while (budget > 0 && (node = walker.nextNode())) {
+    const tag = node.parentNode && node.parentNode.nodeName;
+    if (tag === 'SCRIPT' || tag === 'STYLE' || tag === 'NOSCRIPT') continue;
+    const text = node.nodeValue || '';
+    budget -= text.length;
+    if (re.test(text)) return true;
+  }
+  return false;
+}
+"""
+
+_stats_lock = threading.Lock()
+READINESS_STATS: Dict[str, Dict[str, float]] = {}
+
+
+def _record(kind: str, elapsed_ms: float, ready: bool) -> None:
+    observe_stage(f"wait_{kind}", elapsed_ms / 1000)
+    if not ready:
+        count(TIMEOUTS, stage=f"wait_{kind}")
+    with _stats_lock:
+        st = READINESS_STATS.setdefault(kind, {"count": 0, "timeouts": 0, "total_ms": 0.0, "max_ms": 0.0})
+        st["count"] += 1
+        st["total_ms"] += elapsed_ms
+        st["max_ms"] = max(st["max_ms"], elapsed_ms)
+        if not ready:
+            st["timeouts"] += 1
+
+
+class ReadyResult:
+    """Outcome of a readiness wait: whether it succeeded and how long it took."""
+
+    __slots__ = ("kind", "ready", "elapsed_ms", "value")
+
+    def __init__(self, kind: str, ready: bool, elapsed_ms: float, value=None):
+        self.kind = kind
+        self.ready = ready
+        self.elapsed_ms = elapsed_ms
+        self.value = value
+
+    def __bool__(self) -> bool:
+        return self.ready
+
+    def __repr__(self) -> str:
+        return f"ReadyResult({self.kind!r}, ready={self.ready}, elapsed_ms={self.elapsed_ms:.0f})"
+
+
+def wait_until_ready(page: Page, kind: str, timeout_ms: int = 8000) -> ReadyResult:
+    """Wait until the READY_PREDICATES check for ``kind`` passes, or ``timeout_ms``."""
+    started = time.monotonic()
+    ready = True
+    try:
+        page.wait_for_function(READY_PREDICATES[kind], timeout=max(1, timeout_ms), polling=100)
+    except Exception:
+        ready = False
+    elapsed = (time.monotonic() - started) * 1000
+    _record(kind, elapsed, ready)
+    return ReadyResult(kind, ready, elapsed)
+
+
+def wait_for_stable_count(
+    page: Page,
+    selector: str,
+    timeout_ms: int = 6000,
+    quiet_ms: int = 500,
+    min_count: int = 1,
+    kind: str = "stable_count",
+) -> ReadyResult:
+    """Wait until at least ``min_count`` elements match and the count stops growing for ``quiet_ms``.
+
+    ``value`` on the result is the final element count.
+    """
+    started = time.monotonic()
+    ready = True
+    try:
+        page.evaluate("() => { window.__readyStable = null; }")
+        page.wait_for_function(
+            _STABLE_COUNT_JS, arg=[selector, quiet_ms, min_count], timeout=max(1, timeout_ms), polling=100
+        )
+    except Exception:
+        ready = False
+    try:
+        seen = page.eval_on_selector_all(selector, "els => els.length")
+    except Exception:
+        seen = None
+    elapsed = (time.monotonic() - started) * 1000
+    _record(kind, elapsed, ready)
+    return ReadyResult(kind, ready, elapsed, seen)
+
+
+def wait_for_network_quiet(
+    page: Page,
+    url_pattern: Union[str, Pattern[str]],
+    timeout_ms: int = 5000,
+    quiet_ms: int = 400,
+    kind: str = "network_quiet",
+) -> ReadyResult:
+    """Wait until no request matching ``url_pattern`` has been in flight for ``quiet_ms``.
+
+    Unlike ``networkidle`` this ignores trackers, media and long polls and
+    only watches the requests we actually care about (e.g. feed item_list).
+    """
+    pattern = re.compile(url_pattern) if isinstance(url_pattern, str) else url_pattern
+    inflight = set()
+    last_change = [time.monotonic()]
+
+    def on_request(request) -> None:
+        if pattern.search(request.url):
+            inflight.add(request)
+            last_change[0] = time.monotonic()
+
+    def on_done(request) -> None:
+        if request in inflight:
+            inflight.discard(request)
+            last_change[0] = time.monotonic()
+
+    page.on("request", on_request)
+    page.on("requestfinished", on_done)
+    page.on("requestfailed", on_done)
+    started = time.monotonic()
+    deadline = started + timeout_ms / 1000
+    ready = False
+    try:
+        while time.monotonic() < deadline:
+            # Yield to Playwright so request events are dispatched.
+            page.wait_for_timeout(50)
+            if not inflight and (time.monotonic() - last_change[0]) * 1000 >= quiet_ms:
+                ready = True
+                break
+    finally:
+        for event, handler in (("request", on_request), ("requestfinished", on_done), ("requestfailed", on_done)):
+            try:
+                page.remove_listener(event, handler)
+            except Exception:
+                pass
+    elapsed = (time.monotonic() - started) * 1000
+    _record(kind, elapsed, ready)
+    return ReadyResult(kind, ready, elapsed)
+
+
+def wait_for_load_quiet(page: Page, timeout_ms: int = 6000, kind: str = "networkidle") -> ReadyResult:
+    """Wait for Playwright's ``networkidle`` load state, bounded by ``timeout_ms``."""
+    started = time.monotonic()
+    ready = True
+    try:
+        page.wait_for_load_state("networkidle", timeout=max(1, timeout_ms))
+    except Exception:
+        ready = False
+    elapsed = (time.monotonic() - started) * 1000
+    _record(kind, elapsed, ready)
+    return ReadyResult(kind, ready, elapsed)
+
+
+def detect_verify_page(page: Page, max_chars: int = 20000) -> bool:
+    """True when the page is a captcha/verify interstitial (0 = scan all text)."""
+    try:
+        return bool(page.evaluate(VERIFY_PAGE_JS, max_chars))
+    except Exception:
+        return False
+
+
+def readiness_stats(kind: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """Snapshot of recorded waits: count, timeouts, total_ms, max_ms and avg_ms per kind."""
+    with _stats_lock:
+        snap = {k: dict(v) for k, v in READINESS_STATS.items() if kind is None or k == kind}
+    for st in snap.values():
+        st["avg_ms"] = st["total_ms"] / st["count"] if st["count"] else 0.0
+    return snap
@@ -0,0 +1,238 @@
+"""Per-host request scheduling: rate limit, retries and a verify-page circuit breaker.
+
+Scrapers run each navigation or fetch through ``get_scheduler().run(url, fn)``.
+Before every attempt the call waits for the host's token bucket. ``fn``
+raises VerifyPageError when the site answers with a captcha/verify
+interstitial; ``threshold`` of those in a row open the host's breaker (and
+the ``on_verify`` hook rotates the session). While it is open every call
+fails fast with BreakerOpenError, so callers degrade at once instead of
+timing out on link after link; after the cooldown a single caller probes
+the host. Other failures are retried with jittered exponential backoff.
+"""
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Type, TypeVar
+from urllib.parse import urlsplit
+
+from utils.metrics import BREAKER_TRIPS, RETRIES, count, stage
+from utils.ratelimit import TokenBucket
+
+
+T = TypeVar("T")
+
+
+class VerifyPageError(RuntimeError):
+    """The site served a captcha/verify page instead of content."""
+
+
+class BreakerOpenError(VerifyPageError):
+    """The host's breaker is open (or another caller is probing it); the call was not made."""
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures and stays open for ``cooldown`` seconds.
+
+    After the cooldown one caller at a time is let through as a probe; one
+    more failure reopens it, a success closes it. A probe that reports
+    neither is given up on after another ``cooldown``.
+    """
+
+    def __init__(self, threshold: int = 3, cooldown: float = 30.0):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self.probe_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "open" if time.monotonic() - self.opened_at < self.cooldown else "half_open"
+
+    def remaining(self) -> float:
+        """Seconds until the breaker lets calls through again (0 when closed or half-open)."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; in half-open state only the first caller gets True."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.cooldown:
+                return False
+            if self.probe_at is not None and now - self.probe_at < self.cooldown:
+                return False
+            self.probe_at = now
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_at = None
+
+    def failure(self) -> bool:
+        """Record a failure; returns True if this one (re)opened the breaker."""
+        with self._lock:
+            self.failures += 1
+            if self.failures < self.threshold:
+                return False
+            half_open = self.opened_at is not None and time.monotonic() - self.opened_at >= self.cooldown
+            if self.opened_at is not None and not half_open:
+                return False
+            self.opened_at = time.monotonic()
+            self.probe_at = None
+            self.trips += 1
+            return True
+
+
+class HostScheduler:
+    """Token bucket + circuit breaker per host, with retrying ``run()``.
+
+    - rate / burst: requests per second and bucket size per host (rate <= 0 = unlimited)
+    - retries: extra attempts after the first failure
+    - base_delay / max_delay: backoff before retry n is uniform in
+      [d/2, d] with d = min(max_delay, base_delay * 2**n)
+    - threshold / cooldown: consecutive verify pages that open a host's
+      breaker, and how long calls to it fail fast before a probe
+    """
+
+    def __init__(
+        self,
+        rate: float = 4.0,
+        burst: float = 8.0,
+        retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        threshold: int = 3,
+        cooldown: float = 30.0,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.retries = max(0, retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._hosts: Dict[str, Tuple[TokenBucket, CircuitBreaker]] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> Tuple[TokenBucket, CircuitBreaker]:
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                entry = (TokenBucket(self.rate, self.burst), CircuitBreaker(self.threshold, self.cooldown))
+                self._hosts[host] = entry
+            return entry
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        return self._host(urlsplit(url).hostname or "")[1]
+
+    def acquire(self, url: str) -> None:
+        """Block until a request token for ``url``'s host is available.
+
+        Raises BreakerOpenError right away while the host's breaker is open.
+        """
+        bucket, breaker = self._host(urlsplit(url).hostname or "")
+        if not breaker.allow():
+            raise BreakerOpenError(url)
+        with stage("schedule_wait"):
+            bucket.acquire()
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    def report_verify(self, url: str) -> bool:
+        """Count a verify page for ``url``'s host; returns True if the breaker tripped."""
+        host = urlsplit(url).hostname or ""
+        tripped = self._host(host)[1].failure()
+        if tripped:
+            count(BREAKER_TRIPS, host=host)
+        return tripped
+
+    def report_success(self, url: str) -> None:
+        self._host(urlsplit(url).hostname or "")[1].success()
+
+    def run(
+        self,
+        url: str,
+        fn: Callable[[], T],
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+        on_verify: Optional[Callable[[bool], None]] = None,
+        give_up_on: Tuple[Type[BaseException], ...] = (),
+    ) -> T:
+        """Call ``fn`` under ``url``'s host limits, retrying failures listed in ``retry_on``.
+
+        ``on_verify(tripped)`` runs after each VerifyPageError (e.g. to rotate
+        the browser session); once the host's breaker is open the error is
+        raised without further attempts, and calls made while it stays open
+        raise BreakerOpenError before ``fn`` runs. Exceptions in ``give_up_on`` (e.g. a timeout
+        that already cost the full budget) are raised at once, without a
+        retry. The last exception is raised once retries run out.
+        """
+        host = urlsplit(url).hostname or ""
+        for attempt in range(self.retries + 1):
+            self.acquire(url)
+            try:
+                result = fn()
+            except VerifyPageError:
+                tripped = self.report_verify(url)
+                if on_verify is not None:
+                    on_verify(tripped)
+                if attempt == self.retries or self._host(host)[1].state == "open":
+                    raise
+            except give_up_on:
+                raise
+            except retry_on:
+                if attempt == self.retries:
+                    raise
+            else:
+                self.report_success(url)
+                return result
+            count(RETRIES, host=host)
+            time.sleep(self.backoff(attempt))
+        raise AssertionError("unreachable")
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {
+            host: {"state": breaker.state, "failures": breaker.failures, "trips": breaker.trips}
+            for host, (_bucket, breaker) in hosts.items()
+        }
+
+
+_scheduler: Optional[HostScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> HostScheduler:
+    """Process-wide scheduler, configured from the environment.
+
+    - TIKTOK_HOST_RPS / TIKTOK_HOST_BURST: per-host request rate and burst (default 4 / 8, 0 = unlimited)
+    - TIKTOK_RETRIES: retries per video (default 2)
+    - TIKTOK_BREAKER_THRESHOLD / TIKTOK_BREAKER_COOLDOWN: verify pages in a row that
+      pause a host, and for how many seconds (default 3 / 30)
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = HostScheduler(
+                rate=float(os.environ.get("TIKTOK_HOST_RPS", 4)),
+                burst=float(os.environ.get("TIKTOK_HOST_BURST", 8)),
+                retries=int(os.environ.get("TIKTOK_RETRIES", 2)),
+                threshold=int(os.environ.get("TIKTOK_BREAKER_THRESHOLD", 3)),
+                cooldown=float(os.environ.get("TIKTOK_BREAKER_COOLDOWN", 30)),
+            )
+        return _scheduler
@@ -0,0 +1,141 @@
+"""On-disk rotation of browser storage states (cookies + localStorage).
+
+New browser contexts take the next stored session round-robin, so a warm
+pool or a fresh run starts with the cookies of earlier ones instead of an
+empty profile. Until ``max_sessions`` exist, each new context starts a new
+cold session; sessions older than ``max_age`` are retired so the rotation
+keeps renewing itself. Each session is one JSON file, written atomically,
+so several processes can share a directory.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+
+class SessionStore:
+    def __init__(self, directory: str, max_sessions: int = 4, max_age: float = 24 * 3600):
+        self.directory = directory
+        self.max_sessions = max(1, max_sessions)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._next = 0
+        self.counters = {"warm": 0, "cold": 0, "saves": 0, "expired": 0, "discarded": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _read(self, name: str) -> Optional[Dict[str, object]]:
+        try:
+            with open(self._path(name), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _live(self) -> List[Tuple[str, Dict[str, object]]]:
+        """Non-expired sessions, oldest first; expired files are removed."""
+        now = time.time()
+        live = []
+        for fname in sorted(os.listdir(self.directory)):
+            if not fname.endswith(".json"):
+                continue
+            name = fname[:-5]
+            data = self._read(name)
+            if data is None or now - float(data.get("created", 0)) > self.max_age:
+                self._remove(name)
+                self.counters["expired"] += 1
+                continue
+            live.append((name, data))
+        live.sort(key=lambda item: float(item[1].get("created", 0)))
+        return live
+
+    def _remove(self, name: str) -> None:
+        try:
+            os.remove(self._path(name))
+        except OSError:
+            pass
+
+    def checkout(self) -> Tuple[str, Optional[Dict[str, object]]]:
+        """Return ``(name, storage_state)`` for a new context; state is None for a cold session."""
+        with self._lock:
+            live = self._live()
+            # Contexts that started cold at the same time can overshoot the limit.
+            while len(live) > self.max_sessions:
+                self._remove(live.pop(0)[0])
+            if len(live) < self.max_sessions:
+                self.counters["cold"] += 1
+                return uuid.uuid4().hex[:12], None
+            name, data = live[self._next % len(live)]
+            self._next += 1
+            self.counters["warm"] += 1
+            state = data.get("state") or {}
+            now = time.time()
+            # Drop cookies that expired while the session sat on disk.
+            cookies = [c for c in state.get("cookies", []) if not (0 < c.get("expires", -1) < now)]
+            return name, dict(state, cookies=cookies)
+
+    def is_consented(self, name: str) -> bool:
+        """True once the cookie banner was accepted in this session."""
+        data = self._read(name)
+        return bool(data and data.get("consented"))
+
+    def save(self, name: str, state: Dict[str, object], consented: bool = False) -> None:
+        """Write the context's ``storage_state()`` for ``name`` (atomic replace)."""
+        with self._lock:
+            previous = self._read(name) or {}
+            data = {
+                "created": previous.get("created", time.time()),
+                "saved": time.time(),
+                "consented": bool(consented or previous.get("consented")),
+                "state": state,
+            }
+            tmp = self._path(name) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self._path(name))
+            self.counters["saves"] += 1
+
+    def discard(self, name: str) -> None:
+        """Retire a session (e.g. one that keeps hitting verification pages)."""
+        with self._lock:
+            self._remove(name)
+            self.counters["discarded"] += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            out: Dict[str, object] = dict(self.counters)
+            out["sessions"] = len(self._live())
+            return out
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def current_session_store() -> Optional[SessionStore]:
+    """The store if a browser context already opened it, without creating its directory."""
+    return _store
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """Process-wide session store, configured from the environment (None when disabled).
+
+    - TIKTOK_SESSIONS: 0 disables storage-state reuse (default 1)
+    - TIKTOK_SESSION_DIR: directory of session files (default .tiktok_sessions)
+    - TIKTOK_SESSION_MAX: sessions kept in rotation (default 4)
+    - TIKTOK_SESSION_TTL: seconds before a session is retired (default 86400)
+    """
+    global _store
+    if os.environ.get("TIKTOK_SESSIONS", "1") == "0":
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore(
+                directory=os.environ.get("TIKTOK_SESSION_DIR") or ".tiktok_sessions",
+                max_sessions=int(os.environ.get("TIKTOK_SESSION_MAX", 4)),
+                max_age=float(os.environ.get("TIKTOK_SESSION_TTL", 24 * 3600)),
+            )
+        return _store
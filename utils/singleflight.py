@@ -0,0 +1,77 @@
+"""Coalesce concurrent identical calls and cap how many run at once."""
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class Overloaded(RuntimeError):
+    """The admission limit is reached; the caller should retry later."""
+
+
+class SingleFlight:
+    """``do(key, fn)`` runs ``fn`` once per key at a time; concurrent callers share its outcome.
+
+    ``max_inflight`` caps distinct calls in progress. A new key that would
+    exceed it raises Overloaded immediately instead of queueing, while
+    callers joining an existing flight are always admitted.
+    """
+
+    def __init__(self, max_inflight: int = 4):
+        self.max_inflight = max(1, max_inflight)
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+        self.counters = {"leaders": 0, "shared": 0, "rejected": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """Return ``(result, shared)``; ``shared`` is True for callers that joined another's flight."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.counters["shared"] += 1
+                leader = False
+            elif len(self._flights) >= self.max_inflight:
+                self.counters["rejected"] += 1
+                raise Overloaded(f"{len(self._flights)} requests already in flight")
+            else:
+                future = self._flights[key] = Future()
+                self.counters["leaders"] += 1
+                leader = True
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def admit(self) -> Callable[[], None]:
+        """Take an admission slot without coalescing (e.g. a streamed response); returns its release."""
+        key = object()
+        with self._lock:
+            if len(self._flights) >= self.max_inflight:
+                self.counters["rejected"] += 1
+                raise Overloaded(f"{len(self._flights)} requests already in flight")
+            self._flights[key] = Future()
+            self.counters["leaders"] += 1
+
+        def release() -> None:
+            with self._lock:
+                self._flights.pop(key, None)
+
+        return release
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self.counters)
+            out["inflight"] = len(self._flights)
+            out["max_inflight"] = self.max_inflight
+            return out
@@ -0,0 +1,150 @@
+"""Multi-process sharded execution for scrape batches.
+
+Sync Playwright keeps each scrape on one thread and event loop, so a large
+batch only scales across cores by running several processes. A persistent
+ProcessPoolExecutor (spawn context, so no Playwright state is forked) keeps
+its workers alive between calls; each worker's main thread owns a warm
+BrowserPool via create_page(). A coordinator splits the batch into shards,
+merges results back in input order and restarts the pool if a worker dies.
+
+The pool is sized once (TIKTOK_PROCESSES, default one per CPU) and shared
+by concurrent callers; a caller's ``processes`` only caps how many of its
+shards are in flight at a time.
+"""
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+RESTARTS = {"count": 0}
+
+
+def default_processes() -> int:
+    return max(1, int(os.environ.get("TIKTOK_PROCESSES", 0) or os.cpu_count() or 1))
+
+
+def clamp_processes(processes: Optional[int]) -> int:
+    """Processes a caller may use: ``processes`` (0/None = all), at most default_processes()."""
+    limit = default_processes()
+    return max(1, min(int(processes or limit), limit))
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared worker pool, creating it with default_processes() workers on first use."""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None:
+            _pool_size = default_processes()
+            _pool = ProcessPoolExecutor(max_workers=_pool_size, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _restart_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    """Replace ``broken`` with a fresh pool (no-op if another caller already did).
+
+    Queued futures are left alone: they belong to other callers too, and
+    fail with BrokenProcessPool on their own so each caller resubmits them.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            broken.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=_pool_size, mp_context=multiprocessing.get_context("spawn"))
+            RESTARTS["count"] += 1
+        return _pool
+
+
+def _map_items(item_fn: Callable, shard: List) -> List[Tuple[bool, object]]:
+    """Worker side: run ``item_fn`` per item so one bad item does not sink its shard."""
+    out: List[Tuple[bool, object]] = []
+    for item in shard:
+        try:
+            out.append((True, item_fn(item)))
+        except Exception as exc:
+            out.append((False, exc))
+    return out
+
+
+def imap_sharded(
+    item_fn: Callable,
+    items: Iterable,
+    processes: Optional[int] = None,
+    shard_size: Optional[int] = None,
+    max_restarts: int = 2,
+    on_error: Optional[Callable[[object, BaseException], object]] = None,
+) -> Iterator:
+    """Apply picklable ``item_fn`` to ``items`` across worker processes, yielding in input order.
+
+    At most ``processes`` shards (see clamp_processes()) run at once. A
+    shard whose worker crashes is retried on a restarted pool up to
+    ``max_restarts`` times; after that its items, like any item whose
+    ``item_fn`` raised, become ``on_error(item, exc)`` (or the exception
+    propagates when no ``on_error`` is given).
+    """
+    items = list(items)
+    if not items:
+        return
+    processes = clamp_processes(processes)
+    shard_size = shard_size or max(1, math.ceil(len(items) / (processes * 4)))
+    shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+    task = partial(_map_items, item_fn)
+    pool = get_process_pool()
+    futures: Dict[int, Future] = {}
+    attempts = [0] * len(shards)
+
+    def submit(j: int) -> None:
+        nonlocal pool
+        try:
+            futures[j] = pool.submit(task, shards[j])
+        except (BrokenProcessPool, RuntimeError):
+            # Another caller already replaced (and shut down) this pool.
+            pool = _restart_pool(pool)
+            futures[j] = pool.submit(task, shards[j])
+
+    def submit_until(limit: int) -> None:
+        for j in range(len(futures), min(limit, len(shards))):
+            submit(j)
+
+    def failed(item, exc: BaseException):
+        if on_error is None:
+            raise exc
+        return on_error(item, exc)
+
+    for i in range(len(shards)):
+        # Keep a window of ``processes`` shards in flight, starting at the one being read.
+        submit_until(i + processes)
+        while True:
+            try:
+                results = futures[i].result()
+                break
+            except (BrokenProcessPool, CancelledError) as exc:
+                # CancelledError: the shard was dropped with a pool another caller shut down.
+                if isinstance(exc, BrokenProcessPool):
+                    attempts[i] += 1
+                    if attempts[i] > max_restarts:
+                        results = [(False, exc)] * len(shards[i])
+                        break
+                pool = _restart_pool(pool)
+                # Resubmit every shard that has not finished or died with the old pool.
+                for j in range(i, len(futures)):
+                    f = futures[j]
+                    if f.cancelled() or not f.done() or isinstance(f.exception(), BrokenProcessPool):
+                        submit(j)
+            except Exception as exc:  # e.g. unpicklable arguments or results
+                results = [(False, exc)] * len(shards[i])
+                break
+        for item, (ok, value) in zip(shards[i], results):
+            yield value if ok else failed(item, value)
+
+
+def run_sharded(item_fn: Callable, items: Iterable, processes: Optional[int] = None, **kwargs) -> List:
+    """List version of imap_sharded()."""
+    return list(imap_sharded(item_fn, items, processes=processes, **kwargs))